@@ -0,0 +1 @@
+"""Benchmarks for pypolar, run with asv (airspeed velocity)."""
@@ -0,0 +1,95 @@
+# pylint: disable=invalid-name
+"""Benchmarks for Fresnel coefficients and ellipsometry."""
+
+import numpy as np
+import pypolar.fresnel as fresnel
+
+
+class WavelengthAngleGrid:
+    """Fresnel routines over a grid of (dispersive) index and angle."""
+
+    params = ([10, 1000], [90, 900])
+    param_names = ['wavelengths', 'angles']
+
+    def setup(self, wavelengths, angles):
+        lambda0 = np.linspace(0.4, 0.8, wavelengths)
+        # Cauchy dispersion with weak absorption, one row per wavelength
+        self.m = (1.45 + 0.004 / lambda0**2 - 0.001j)[:, None]
+        self.theta = np.linspace(0, np.pi / 2, angles)
+
+    def time_r_par(self, wavelengths, angles):
+        fresnel.r_par(self.m, self.theta)
+
+    def time_r_per(self, wavelengths, angles):
+        fresnel.r_per(self.m, self.theta)
+
+    def time_t_par(self, wavelengths, angles):
+        fresnel.t_par(self.m, self.theta)
+
+    def time_t_per(self, wavelengths, angles):
+        fresnel.t_per(self.m, self.theta)
+
+    def time_R_par(self, wavelengths, angles):
+        fresnel.R_par(self.m, self.theta)
+
+    def time_R_per(self, wavelengths, angles):
+        fresnel.R_per(self.m, self.theta)
+
+    def time_T_par(self, wavelengths, angles):
+        fresnel.T_par(self.m, self.theta)
+
+    def time_T_per(self, wavelengths, angles):
+        fresnel.T_per(self.m, self.theta)
+
+    def time_R_unpolarized(self, wavelengths, angles):
+        fresnel.R_unpolarized(self.m, self.theta)
+
+    def time_T_unpolarized(self, wavelengths, angles):
+        fresnel.T_unpolarized(self.m, self.theta)
+
+    def time_ellipsometry_rho(self, wavelengths, angles):
+        fresnel.ellipsometry_rho(self.m, self.theta)
+
+    def time_coefficients(self, wavelengths, angles):
+        fresnel.coefficients(self.m, self.theta)
+
+
+class FresnelTable:
+    """Interpolation table compared with the exact formulas above."""
+
+    def setup(self):
+        self.table = fresnel.FresnelTable(1.5 - 0.001j)
+        self.theta = np.random.default_rng(0).uniform(0, np.pi / 2, 1000000)
+
+    def time_build(self):
+        fresnel.FresnelTable(1.5 - 0.001j)
+
+    def time_R_par(self):
+        self.table.R_par(self.theta)
+
+
+class ThinFilm:
+    """Single film on a substrate over a wavelength x angle grid."""
+
+    def setup(self):
+        self.lambda0 = np.linspace(400, 800, 200)[:, None]
+        self.theta = np.radians(np.linspace(0, 80, 81))
+
+    def time_film_ellipsometry_rho(self):
+        fresnel.film_ellipsometry_rho(1.46, 100, 3.88 - 0.02j, self.lambda0, self.theta)
+
+
+class EllipsometryParameters:
+    """Demodulation of rotating-analyzer sweeps."""
+
+    params = [1, 1000, 100000]
+    param_names = ['sweeps']
+
+    def setup(self, sweeps):
+        self.phi = np.linspace(0, np.pi, 36, endpoint=False)
+        psi = np.linspace(0.2, 0.6, sweeps)[:, None]
+        self.signal = (1 - np.cos(2 * psi) * np.cos(2 * self.phi)
+                       + np.sin(2 * psi) * np.cos(1.0) * np.sin(2 * self.phi))
+
+    def time_ellipsometry_parameters(self, sweeps):
+        fresnel.ellipsometry_parameters(self.phi, self.signal, np.pi / 4)
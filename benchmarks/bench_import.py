@@ -0,0 +1,37 @@
+# pylint: disable=invalid-name
+"""
+Cold-start cost of importing pypolar.
+
+Each timeraw_ benchmark runs in a fresh interpreter so that the time
+includes loading every module pulled in by the import.  The track_
+benchmark counts the matplotlib and sympy modules loaded by the numerical
+modules and should stay at zero.
+"""
+
+import subprocess
+import sys
+
+
+def timeraw_import_pypolar():
+    """Import of the package itself."""
+    return "import pypolar"
+
+
+def timeraw_import_numerics():
+    """Import of the numerical modules used by batch workers."""
+    return "import pypolar.jones, pypolar.mueller, pypolar.fresnel"
+
+
+def timeraw_import_visualization():
+    """Import of visualization, which must not load matplotlib."""
+    return "import pypolar.visualization"
+
+
+def track_heavy_modules_loaded():
+    """Number of matplotlib and sympy modules loaded by the numerics."""
+    code = ("import sys, pypolar.jones, pypolar.mueller, pypolar.fresnel\n"
+            "print(sum(m.split('.')[0] in ('matplotlib', 'sympy') for m in sys.modules))")
+    return int(subprocess.check_output([sys.executable, '-c', code]))
+
+
+track_heavy_modules_loaded.unit = 'modules'
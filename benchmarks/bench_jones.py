@@ -0,0 +1,77 @@
+# pylint: disable=invalid-name
+"""Benchmarks for Jones operator construction and conversion."""
+
+import numpy as np
+import pypolar.jones as jones
+
+
+class OperatorsScalar:
+    """Construction of single 2x2 Jones operators."""
+
+    def time_op_linear_polarizer(self):
+        jones.op_linear_polarizer(0.3)
+
+    def time_op_retarder(self):
+        jones.op_retarder(0.3, 0.7)
+
+    def time_op_attenuator(self):
+        jones.op_attenuator(0.5)
+
+    def time_op_rotation(self):
+        jones.op_rotation(0.3)
+
+    def time_op_quarter_wave_plate(self):
+        jones.op_quarter_wave_plate(0.3)
+
+    def time_op_half_wave_plate(self):
+        jones.op_half_wave_plate(0.3)
+
+    def time_op_fresnel_reflection(self):
+        jones.op_fresnel_reflection(1.5 - 0.01j, 0.3)
+
+    def time_op_fresnel_transmission(self):
+        jones.op_fresnel_transmission(1.5 - 0.01j, 0.3)
+
+
+class OperatorsBatched:
+    """Construction of stacks of 2x2 Jones operators."""
+
+    params = [1000, 1000000]
+    param_names = ['n']
+
+    def setup(self, n):
+        self.theta = np.linspace(0, np.pi, n)
+        self.delta = np.linspace(0, 2 * np.pi, n)
+
+    def time_op_linear_polarizer(self, n):
+        jones.op_linear_polarizer(self.theta)
+
+    def time_op_retarder(self, n):
+        jones.op_retarder(self.theta, self.delta)
+
+    def time_op_rotation(self, n):
+        jones.op_rotation(self.theta)
+
+    def time_op_fresnel_reflection(self, n):
+        jones.op_fresnel_reflection(1.5 - 0.01j, self.theta / 2)
+
+    def time_op_retarder_stack(self, n):
+        jones.op_retarder_stack(self.theta.reshape(-1, 100), self.delta.reshape(-1, 100))
+
+
+class Conversion:
+    """Jones to Mueller conversion and analysis of Jones vectors."""
+
+    params = [1, 1000, 1000000]
+    param_names = ['n']
+
+    def setup(self, n):
+        rng = np.random.default_rng(0)
+        self.J = jones.op_retarder(rng.uniform(0, np.pi, n), rng.uniform(0, np.pi, n))
+        self.E = rng.normal(size=(n, 2)) + 1j * rng.normal(size=(n, 2))
+
+    def time_jones_op_to_mueller_op(self, n):
+        jones.jones_op_to_mueller_op(self.J)
+
+    def time_ellipse_parameters(self, n):
+        jones.ellipse_parameters(self.E)
@@ -0,0 +1,83 @@
+# pylint: disable=invalid-name
+"""Benchmarks for Mueller operator construction and conversion."""
+
+import numpy as np
+import pypolar.jones as jones
+import pypolar.mueller as mueller
+
+
+class OperatorsScalar:
+    """Construction of single 4x4 Mueller operators."""
+
+    def time_op_linear_polarizer(self):
+        mueller.op_linear_polarizer(0.3)
+
+    def time_op_retarder(self):
+        mueller.op_retarder(0.3, 0.7)
+
+    def time_op_attenuator(self):
+        mueller.op_attenuator(0.5)
+
+    def time_op_rotation(self):
+        mueller.op_rotation(0.3)
+
+    def time_op_quarter_wave_plate(self):
+        mueller.op_quarter_wave_plate(0.3)
+
+    def time_op_half_wave_plate(self):
+        mueller.op_half_wave_plate(0.3)
+
+    def time_op_fresnel_reflection(self):
+        mueller.op_fresnel_reflection(1.5 - 0.01j, 0.3)
+
+    def time_op_fresnel_transmission(self):
+        mueller.op_fresnel_transmission(1.5 - 0.01j, 0.3)
+
+
+class OperatorsBatched:
+    """Construction of stacks of 4x4 Mueller operators."""
+
+    params = [1000, 1000000]
+    param_names = ['n']
+
+    def setup(self, n):
+        self.theta = np.linspace(0, np.pi, n)
+        self.delta = np.linspace(0, 2 * np.pi, n)
+
+    def time_op_linear_polarizer(self, n):
+        mueller.op_linear_polarizer(self.theta)
+
+    def time_op_retarder(self, n):
+        mueller.op_retarder(self.theta, self.delta)
+
+    def time_op_rotation(self, n):
+        mueller.op_rotation(self.theta)
+
+    def time_op_fresnel_reflection(self, n):
+        mueller.op_fresnel_reflection(1.5 - 0.01j, self.theta / 2)
+
+
+class Conversion:
+    """Mueller to Jones and Stokes to Jones conversion and Stokes analysis."""
+
+    params = [1, 1000, 1000000]
+    param_names = ['n']
+
+    def setup(self, n):
+        rng = np.random.default_rng(0)
+        J = jones.op_retarder(rng.uniform(0, np.pi, n), rng.uniform(0, np.pi, n))
+        self.M = jones.jones_op_to_mueller_op(J)
+        # horizontally polarized light through each retarder
+        self.S = self.M @ np.array([1, 1, 0, 0])
+
+    def time_mueller_to_jones(self, n):
+        mueller.mueller_to_jones(self.M)
+
+    def time_mueller_to_jones_residual(self, n):
+        mueller.mueller_to_jones(self.M, return_residual=True)
+
+    def time_stokes_to_jones(self, n):
+        mueller.stokes_to_jones(self.S)
+
+    def time_ellipse_parameters(self, n):
+        mueller.ellipse_parameters(self.S)
@@ -0,0 +1,54 @@
+# pylint: disable=invalid-name
+"""Benchmarks for the sympy constructors in sym_jones and sym_mueller."""
+
+import sympy
+import pypolar.sym_jones as sym_jones
+import pypolar.sym_mueller as sym_mueller
+
+
+class SymJones:
+    """Symbolic Jones operators and vectors."""
+
+    def setup(self):
+        self.theta, self.t = sympy.symbols('theta t', real=True)
+        self.m = sympy.Symbol('m')
+
+    def time_op_linear_polarizer(self):
+        sym_jones.op_linear_polarizer(self.theta)
+
+    def time_op_attenuator(self):
+        sym_jones.op_attenuator(self.t)
+
+    def time_op_rotation(self):
+        sym_jones.op_rotation(self.theta)
+
+    def time_op_fresnel_reflection(self):
+        sym_jones.op_fresnel_reflection(self.m, self.theta)
+
+    def time_field_linear(self):
+        sym_jones.field_linear(self.theta)
+
+
+class SymMueller:
+    """Symbolic Mueller operators."""
+
+    def setup(self):
+        self.theta, self.delta, self.t = sympy.symbols('theta delta t', real=True)
+
+    def time_op_linear_polarizer(self):
+        sym_mueller.op_linear_polarizer(self.theta)
+
+    def time_op_retarder(self):
+        sym_mueller.op_retarder(self.theta, self.delta)
+
+    def time_op_attenuator(self):
+        sym_mueller.op_attenuator(self.t)
+
+    def time_op_rotation(self):
+        sym_mueller.op_rotation(self.theta)
+
+    def time_op_quarter_wave_plate(self):
+        sym_mueller.op_quarter_wave_plate(self.theta)
+
+    def time_op_half_wave_plate(self):
+        sym_mueller.op_half_wave_plate(self.theta)
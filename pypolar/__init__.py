@@ -18,8 +18,42 @@ light = mueller.field_left_circular()
 print("Stokes vector for left circularly polarized light")
 print(light)
 
+Submodules are imported on first access and the numerical modules only
+need NumPy.  matplotlib and sympy are needed only by pypolar.visualization
+and the pypolar.sym_* modules and are installed with the extras::
 
+    pip install pypolar[plot,symbolic]
 """
 
+import importlib
+
+from pypolar.backend import set_backend, get_backend
+
 __author__ = 'Scott Prahl'
 __version__ = '0.5.1'
+
+_SUBMODULES = ('backend',
+               'cache',
+               'elements',
+               'ellipsometry',
+               'fresnel',
+               'jones',
+               'mueller',
+               'optical_train',
+               'parallel',
+               'sym_fresnel',
+               'sym_jones',
+               'sym_mueller',
+               'visualization')
+
+
+def __getattr__(name):
+    """Import submodules when they are first used as pypolar.<name>."""
+    if name in _SUBMODULES:
+        return importlib.import_module('pypolar.' + name)
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+
+def __dir__():
+    """List the submodules together with the module attributes."""
+    return sorted(set(globals()) | set(_SUBMODULES))
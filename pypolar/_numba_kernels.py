@@ -0,0 +1,189 @@
+# pylint: disable=invalid-name
+# pylint: disable=not-an-iterable
+# pylint: disable=too-many-arguments
+"""
+Fused kernels compiled by numba for the 'numba' backend.
+
+Each kernel handles one element of a flattened stack per iteration of a
+parallel loop, so no temporary arrays are created.  The wrappers accept
+the same arguments and return the same shapes as the NumPy versions; the
+sign convention is applied by the calling functions.
+
+This module is only imported by pypolar.backend.set_backend('numba').
+"""
+
+import cmath
+import math
+
+import numba
+import numpy as np
+import pypolar.jones
+
+# real and imaginary parts of the matrix that maps J ⊗ J* to Mueller entries
+_T_RE = np.ascontiguousarray(pypolar.jones._KRON_TO_MUELLER.real)  # pylint: disable=protected-access
+_T_IM = np.ascontiguousarray(pypolar.jones._KRON_TO_MUELLER.imag)  # pylint: disable=protected-access
+
+
+@numba.njit(parallel=True, cache=True)
+def _jones_to_mueller(J, T_re, T_im, M):
+    """Convert Jones matrices J (n, 2, 2) into Mueller matrices M (n, 4, 4)."""
+    for p in numba.prange(J.shape[0]):
+        K_re = np.empty(16)
+        K_im = np.empty(16)
+        for i in range(2):
+            for k in range(2):
+                for j in range(2):
+                    for l in range(2):
+                        z = J[p, i, j] * J[p, k, l].conjugate()
+                        K_re[8 * i + 4 * k + 2 * j + l] = z.real
+                        K_im[8 * i + 4 * k + 2 * j + l] = z.imag
+        for q in range(16):
+            acc = 0.0
+            for r in range(16):
+                acc += K_re[r] * T_re[r, q] - K_im[r] * T_im[r, q]
+            M[p, q // 4, q % 4] = acc
+
+
+@numba.njit(parallel=True, cache=True)
+def _mueller_to_jones(M, J):
+    """Convert Mueller matrices M (n, 4, 4) into Jones matrices J (n, 2, 2)."""
+    for p in numba.prange(M.shape[0]):
+        m = M[p]
+        a00 = math.sqrt(max((m[0, 0] + m[0, 1]) + (m[1, 0] + m[1, 1]), 0.0) / 2)
+        a01 = math.sqrt(max((m[0, 0] - m[0, 1]) + (m[1, 0] - m[1, 1]), 0.0) / 2)
+        a10 = math.sqrt(max((m[0, 0] + m[0, 1]) - (m[1, 0] + m[1, 1]), 0.0) / 2)
+        a11 = math.sqrt(max((m[0, 0] - m[0, 1]) - (m[1, 0] - m[1, 1]), 0.0) / 2)
+        t01 = -math.atan2(m[0, 3] + m[1, 3], m[0, 2] + m[1, 2])
+        t10 = math.atan2(m[3, 0] + m[3, 1], m[2, 0] + m[2, 1])
+        t11 = math.atan2(m[3, 2] - m[2, 3], m[2, 2] + m[3, 3])
+        J[p, 0, 0] = a00
+        J[p, 0, 1] = a01 * cmath.exp(1j * t01)
+        J[p, 1, 0] = a10 * cmath.exp(1j * t10)
+        J[p, 1, 1] = a11 * cmath.exp(1j * t11)
+
+
+@numba.njit(parallel=True, cache=True)
+def _stokes_to_jones(S, J):
+    """Convert Stokes vectors S (n, 4) into Jones vectors J (n, 2)."""
+    for p in numba.prange(S.shape[0]):
+        S0, S1, S2, S3 = S[p, 0], S[p, 1], S[p, 2], S[p, 3]
+        Ip = math.sqrt(S1 * S1 + S2 * S2 + S3 * S3)
+        if S0 == 0 or Ip == 0:
+            J[p, 0] = 0
+            J[p, 1] = 0
+            continue
+        E_0 = math.sqrt(Ip)
+        A = math.sqrt(max(1 + S1 / Ip, 0.0) / 2)
+        J[p, 0] = E_0 * A
+        if A == 0:
+            J[p, 1] = E_0
+        else:
+            J[p, 1] = E_0 * complex(S2 / Ip, S3 / Ip) / (2 * A)
+
+
+@numba.njit(parallel=True, cache=True)
+def _fresnel(m, theta, rp, rs, tp, ts, dc):
+    """Fresnel amplitudes and d/c = m*cos(theta_t)/cos(theta_i) for flat arrays."""
+    for p in numba.prange(m.shape[0]):
+        c = math.cos(theta[p])
+        s = math.sin(theta[p])
+        mm = m[p] * m[p]
+        d = cmath.sqrt(mm - s * s)
+        if m[p].imag == 0:
+            d = d.conjugate()
+        mmc = mm * c
+        rp[p] = (mmc - d) / (mmc + d)
+        rs[p] = (c - d) / (c + d)
+        tp[p] = 2 * c * m[p] / (mmc + d)
+        ts[p] = 2 * c / (c + d)
+        dc[p] = d / c
+
+
+@numba.njit(cache=True)
+def _abs2(z):
+    """Return |z|**2 without a square root."""
+    return z.real * z.real + z.imag * z.imag
+
+
+@numba.njit(parallel=True, cache=True)
+def _fresnel_powers(m, theta, Rp, Rs, Tp, Ts):
+    """Fresnel reflected and transmitted power fractions for flat arrays."""
+    for p in numba.prange(m.shape[0]):
+        c = math.cos(theta[p])
+        s = math.sin(theta[p])
+        mm = m[p] * m[p]
+        d = cmath.sqrt(mm - s * s)
+        if m[p].imag == 0:
+            d = d.conjugate()
+        mmc = mm * c
+        p_denom = _abs2(mmc + d)
+        s_denom = _abs2(c + d)
+        Rp[p] = _abs2(mmc - d) / p_denom
+        Rs[p] = _abs2(c - d) / s_denom
+        Tp[p] = 4 * d.real * c * _abs2(m[p]) / p_denom
+        Ts[p] = 4 * d.real * c / s_denom
+
+
+def jones_op_to_mueller_op(J, out=None):
+    """Compiled version of the pypolar.jones function of the same name."""
+    J = np.asarray(J)
+    shape = J.shape[:-2]
+    flat = np.ascontiguousarray(J, dtype=complex).reshape((-1, 2, 2))
+    M = np.empty((flat.shape[0], 4, 4))
+    _jones_to_mueller(flat, _T_RE, _T_IM, M)
+    if out is None:
+        return M.reshape(shape + (4, 4))
+    np.copyto(out, M.reshape(shape + (4, 4)))
+    return out
+
+
+def mueller_to_jones(M):
+    """Compiled version of the pypolar.mueller function of the same name."""
+    M = np.asarray(M)
+    shape = M.shape[:-2]
+    flat = np.ascontiguousarray(M, dtype=float).reshape((-1, 4, 4))
+    J = np.empty((flat.shape[0], 2, 2), dtype=complex)
+    _mueller_to_jones(flat, J)
+    return J.reshape(shape + (2, 2))
+
+
+def stokes_to_jones(S):
+    """Compiled version of the pypolar.mueller function of the same name."""
+    S = np.asarray(S)
+    shape = S.shape[:-1]
+    flat = np.ascontiguousarray(S, dtype=float).reshape((-1, 4))
+    J = np.empty((flat.shape[0], 2), dtype=complex)
+    _stokes_to_jones(flat, J)
+    return J.reshape(shape + (2,))
+
+
+def _fresnel_call(kernel, m, theta_i, count, dtype):
+    """Broadcast m and theta_i, run kernel, and return count results."""
+    m, theta_i = np.broadcast_arrays(np.asarray(m, dtype=complex),
+                                     np.asarray(theta_i, dtype=float))
+    shape = m.shape
+    m = np.ascontiguousarray(m).reshape(-1)
+    theta_i = np.ascontiguousarray(theta_i).reshape(-1)
+    results = [np.empty(m.shape, dtype=dtype) for _ in range(count)]
+    kernel(m, theta_i, *results)
+    return tuple(r.reshape(shape)[()] for r in results)
+
+
+def fresnel_amplitudes(m, theta_i):
+    """
+    Return r_par, r_per, t_par, t_per and m*cos(theta_t)/cos(theta_i).
+
+    m and theta_i are broadcast against each other and the results are
+    complex arrays with the broadcast shape.
+    """
+    return _fresnel_call(_fresnel, m, theta_i, 5, complex)
+
+
+def fresnel_powers(m, theta_i):
+    """
+    Return R_par, R_per, T_par and T_per.
+
+    m and theta_i are broadcast against each other and the results are
+    real arrays with the broadcast shape.
+    """
+    return _fresnel_call(_fresnel_powers, m, theta_i, 4, float)
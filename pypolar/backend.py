@@ -0,0 +1,61 @@
+# pylint: disable=invalid-name
+# pylint: disable=global-statement
+"""
+Selection of the computational backend.
+
+Two backends are available:
+
+* 'numpy' (the default) uses the vectorized NumPy expressions.
+* 'numba' uses fused kernels compiled by numba.  Each element of a stack
+  is converted in a single pass without temporary arrays and the loops
+  run in parallel over all cores.  numba must be installed.
+
+The compiled kernels replace jones.jones_op_to_mueller_op(),
+mueller.mueller_to_jones(), mueller.stokes_to_jones() and the Fresnel
+amplitude and power coefficients in pypolar.fresnel::
+
+    import pypolar
+
+    pypolar.set_backend('numba')
+    M = pypolar.jones.jones_op_to_mueller_op(J)
+
+Kernels are compiled on first use of each function.
+"""
+
+__all__ = ('set_backend',
+           'get_backend')
+
+_BACKENDS = ('numpy', 'numba')
+_backend = 'numpy'
+_kernels = None
+
+
+def set_backend(name):
+    """
+    Choose the backend used for the hot loops.
+
+    Args:
+        name: 'numpy' or 'numba'
+    """
+    global _backend, _kernels
+    if name not in _BACKENDS:
+        raise ValueError("backend must be 'numpy' or 'numba', not %r" % (name,))
+    if name == 'numba':
+        try:
+            import pypolar._numba_kernels as module  # pylint: disable=import-outside-toplevel
+        except ImportError as err:
+            raise ImportError("the 'numba' backend needs numba to be installed") from err
+        _kernels = module
+    else:
+        _kernels = None
+    _backend = name
+
+
+def get_backend():
+    """Return the name of the backend in use."""
+    return _backend
+
+
+def kernels():
+    """Return the compiled kernel module, or None for the NumPy backend."""
+    return _kernels
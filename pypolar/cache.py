@@ -0,0 +1,142 @@
+# pylint: disable=invalid-name
+"""
+Memoizing cache for the op_* constructors.
+
+Instruments usually visit a small set of stage positions over and over.
+An OperatorCache remembers the matrices built by op_* functions so that
+repeated states cost a dictionary lookup instead of trigonometry and a
+new allocation::
+
+    import pypolar.jones as jones
+    from pypolar.cache import OperatorCache
+
+    cache = OperatorCache(maxsize=256)
+    op_retarder = cache.wrap(jones.op_retarder)
+
+    R = op_retarder(theta, delta)     # computed
+    R = op_retarder(theta, delta)     # served from the cache
+    print(cache.info())
+
+Scalar parameters are rounded to multiples of resolution before they are
+used, both as part of the key and to build the matrix, so every key has
+exactly one value.  Calls with array parameters are passed through
+without caching.  The Jones sign convention in effect is part of the key.
+
+Cached matrices are shared between callers and are therefore returned as
+read-only arrays; use np.array(op) to get a writable copy.
+"""
+
+import collections
+import functools
+import numbers
+import threading
+
+import pypolar.jones
+
+__all__ = ('OperatorCache',
+           'CacheInfo')
+
+
+CacheInfo = collections.namedtuple('CacheInfo',
+                                   ['hits',
+                                    'misses',
+                                    'maxsize',
+                                    'currsize'])
+
+
+class OperatorCache():
+    """Bounded least-recently-used cache of operator matrices."""
+
+    def __init__(self, maxsize=1024, resolution=1e-9):
+        """
+        Create an empty cache.
+
+        Args:
+            maxsize :    largest number of matrices kept
+            resolution : parameters are rounded to multiples of this
+        """
+        self.maxsize = maxsize
+        self.resolution = resolution
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def _quantize(self, value):
+        """Return (key, rounded value) for a scalar or None otherwise."""
+        if isinstance(value, bool):
+            return value, value
+        if isinstance(value, numbers.Real):
+            q = round(value / self.resolution)
+            return q, q * self.resolution
+        if isinstance(value, str):
+            return value, value
+        if isinstance(value, numbers.Complex):
+            qr = round(value.real / self.resolution)
+            qi = round(value.imag / self.resolution)
+            return (qr, qi), complex(qr, qi) * self.resolution
+        return None
+
+    def __call__(self, op, *args, **kwargs):
+        """
+        Return op(*args, **kwargs), from the cache when possible.
+
+        Args:
+            op :     op_* function to call
+            args :   positional parameters of op
+            kwargs : keyword parameters of op
+        Returns:
+            read-only matrix (or a new array for array parameters)
+        """
+        names = sorted(kwargs)
+        quantized = [self._quantize(v) for v in args]
+        quantized += [self._quantize(kwargs[name]) for name in names]
+        if any(q is None for q in quantized):
+            return op(*args, **kwargs)
+
+        key = (op, tuple(names), tuple(q[0] for q in quantized),
+               pypolar.jones.get_convention())
+        with self._lock:
+            matrix = self._entries.get(key)
+            if matrix is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return matrix
+            self._misses += 1
+
+        values = [q[1] for q in quantized]
+        matrix = op(*values[:len(args)], **dict(zip(names, values[len(args):])))
+        matrix.flags.writeable = False
+
+        with self._lock:
+            self._entries[key] = matrix
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return matrix
+
+    def wrap(self, op):
+        """
+        Return a cached version of an op_* function.
+
+        Args:
+            op : op_* function
+        Returns:
+            function with the same signature as op
+        """
+        @functools.wraps(op)
+        def cached_op(*args, **kwargs):
+            return self(op, *args, **kwargs)
+        return cached_op
+
+    def info(self):
+        """Return the hit and miss counts and the size of the cache."""
+        with self._lock:
+            return CacheInfo(self._hits, self._misses, self.maxsize, len(self._entries))
+
+    def clear(self):
+        """Discard all cached matrices and reset the statistics."""
+        with self._lock:
+            self._entries.clear()
+            self._hits = 0
+            self._misses = 0
@@ -0,0 +1,243 @@
+# pylint: disable=invalid-name
+"""
+Structured Jones elements that compose with closed-form rules.
+
+Most Jones operators have structure that a dense 2x2 product ignores:
+
+* retarders and rotations are unitary with unit determinant (SU(2)) and
+  are described by two complex numbers a and b::
+
+      [[a, -conj(b)],
+       [b,  conj(a)]]
+
+* Fresnel reflection and attenuators are diagonal
+* polarizers are rank-1 projectors u w^H
+
+Products of these elements are formed with the matching closed-form rule
+(an SU(2) product, an elementwise product, or an update of one vector of
+the projector) and only fall back to a dense matrix product when the
+structure is lost.  Any product with a projector stays a projector.
+
+Every element may hold a stack of operators; the parameters broadcast just
+like the op_* functions in pypolar.jones.  As with matrices, A @ B means
+that light passes through B first::
+
+    import numpy as np
+    import pypolar.elements as elements
+
+    layers = [elements.Retarder.from_angles(t, 0.01) for t in np.linspace(0, np.pi/2, 500)]
+    cell = elements.compose(layers)
+    J = cell.matrix()
+"""
+
+import functools
+
+import numpy as np
+import pypolar.fresnel
+import pypolar.jones
+
+__all__ = ('Dense',
+           'Diagonal',
+           'Retarder',
+           'Projector',
+           'compose')
+
+
+class Dense():
+    """Jones operator without any known structure."""
+
+    def __init__(self, J):
+        """
+        Create a dense element.
+
+        Args:
+            J: Jones matrix or stack of them with shape (..., 2, 2)
+        """
+        self.J = np.asarray(J)
+
+    def matrix(self):
+        """Return the Jones matrix of the element, or a stack of them."""
+        return self.J
+
+    def mueller(self):
+        """Return the equivalent Mueller matrix (or stack) of the element."""
+        return pypolar.jones.jones_op_to_mueller_op(self.matrix())
+
+    def apply(self, v):
+        """Return the element acting on Jones vectors v with shape (..., 2)."""
+        return (self.matrix() @ np.asarray(v)[..., None])[..., 0]
+
+    def apply_adjoint(self, v):
+        """Return the conjugate transpose of the element acting on v."""
+        JH = np.conjugate(np.swapaxes(self.matrix(), -1, -2))
+        return (JH @ np.asarray(v)[..., None])[..., 0]
+
+    def __matmul__(self, other):
+        """Return the product self @ other (other is passed through first)."""
+        if isinstance(other, Projector):
+            return Projector(self.apply(other.u), other.w)
+        return Dense(self.matrix() @ other.matrix())
+
+
+class Diagonal(Dense):
+    """Diagonal Jones operator such as Fresnel reflection or an attenuator."""
+
+    def __init__(self, d0, d1):
+        """
+        Create a diagonal element diag(d0, d1).
+
+        Args:
+            d0: first diagonal entry (or array of them)
+            d1: second diagonal entry (or array of them)
+        """
+        # pylint: disable=super-init-not-called
+        self.d0, self.d1 = np.broadcast_arrays(d0, d1)
+
+    @classmethod
+    def fresnel_reflection(cls, m, theta):
+        """Diagonal element for Fresnel reflection at angle theta."""
+        return cls(pypolar.fresnel.r_par(m, theta), pypolar.fresnel.r_per(m, theta))
+
+    @classmethod
+    def attenuator(cls, t):
+        """Diagonal element for an isotropic attenuator with transmittance t."""
+        f = np.sqrt(t)
+        return cls(f, f)
+
+    def matrix(self):
+        """Return the Jones matrix of the element, or a stack of them."""
+        J = np.zeros(self.d0.shape + (2, 2), dtype=np.result_type(self.d0, self.d1))
+        J[..., 0, 0] = self.d0
+        J[..., 1, 1] = self.d1
+        return J
+
+    def apply(self, v):
+        """Return the element acting on Jones vectors v with shape (..., 2)."""
+        v = np.asarray(v)
+        return np.stack((self.d0 * v[..., 0], self.d1 * v[..., 1]), axis=-1)
+
+    def apply_adjoint(self, v):
+        """Return the conjugate transpose of the element acting on v."""
+        v = np.asarray(v)
+        return np.stack((np.conjugate(self.d0) * v[..., 0],
+                         np.conjugate(self.d1) * v[..., 1]), axis=-1)
+
+    def __matmul__(self, other):
+        """Return the product self @ other (other is passed through first)."""
+        if isinstance(other, Diagonal):
+            return Diagonal(self.d0 * other.d0, self.d1 * other.d1)
+        return Dense.__matmul__(self, other)
+
+
+class Retarder(Dense):
+    """Unitary Jones operator with unit determinant (retarder or rotation)."""
+
+    def __init__(self, a, b):
+        """
+        Create the SU(2) element [[a, -conj(b)], [b, conj(a)]].
+
+        Args:
+            a: diagonal parameter (or array of them)
+            b: off-diagonal parameter (or array of them)
+        """
+        # pylint: disable=super-init-not-called
+        self.a, self.b = np.broadcast_arrays(a, b)
+
+    @classmethod
+    def from_angles(cls, theta, delta):
+        """Retarder with fast-axis angle theta and retardance delta."""
+        R = pypolar.jones.op_retarder(theta, delta)
+        return cls(R[..., 0, 0], R[..., 1, 0])
+
+    @classmethod
+    def rotation(cls, theta):
+        """Rotation of the light by theta around the optical axis."""
+        return cls(np.cos(theta) + 0j, -np.sin(theta) + 0j)
+
+    def matrix(self):
+        """Return the Jones matrix of the element, or a stack of them."""
+        J = np.empty(self.a.shape + (2, 2), dtype=complex)
+        J[..., 0, 0] = self.a
+        J[..., 0, 1] = -np.conjugate(self.b)
+        J[..., 1, 0] = self.b
+        J[..., 1, 1] = np.conjugate(self.a)
+        return J
+
+    def apply(self, v):
+        """Return the element acting on Jones vectors v with shape (..., 2)."""
+        v = np.asarray(v)
+        x, y = v[..., 0], v[..., 1]
+        return np.stack((self.a * x - np.conjugate(self.b) * y,
+                         self.b * x + np.conjugate(self.a) * y), axis=-1)
+
+    def apply_adjoint(self, v):
+        """Return the conjugate transpose of the element acting on v."""
+        v = np.asarray(v)
+        x, y = v[..., 0], v[..., 1]
+        return np.stack((np.conjugate(self.a) * x + np.conjugate(self.b) * y,
+                         self.a * y - self.b * x), axis=-1)
+
+    def __matmul__(self, other):
+        """Return the product self @ other (other is passed through first)."""
+        if isinstance(other, Retarder):
+            a = self.a * other.a - np.conjugate(self.b) * other.b
+            b = self.b * other.a + np.conjugate(self.a) * other.b
+            return Retarder(a, b)
+        return Dense.__matmul__(self, other)
+
+
+class Projector(Dense):
+    """Rank-1 Jones operator u w^H such as a polarizer."""
+
+    def __init__(self, u, w):
+        """
+        Create the rank-1 element u w^H.
+
+        Args:
+            u: output Jones vector (or array of them) with shape (..., 2)
+            w: input Jones vector (or array of them) with shape (..., 2)
+        """
+        # pylint: disable=super-init-not-called
+        self.u, self.w = np.broadcast_arrays(u, w)
+
+    @classmethod
+    def linear_polarizer(cls, theta):
+        """Linear polarizer with transmission axis at theta from horizontal."""
+        v = np.stack(np.broadcast_arrays(np.cos(theta), np.sin(theta)), axis=-1)
+        return cls(v, v)
+
+    def matrix(self):
+        """Return the Jones matrix of the element, or a stack of them."""
+        return self.u[..., :, None] * np.conjugate(self.w[..., None, :])
+
+    def apply(self, v):
+        """Return the element acting on Jones vectors v with shape (..., 2)."""
+        wv = np.sum(np.conjugate(self.w) * v, axis=-1)
+        return self.u * wv[..., None]
+
+    def apply_adjoint(self, v):
+        """Return the conjugate transpose of the element acting on v."""
+        uv = np.sum(np.conjugate(self.u) * v, axis=-1)
+        return self.w * uv[..., None]
+
+    def __matmul__(self, other):
+        """Return the product self @ other (other is passed through first)."""
+        if isinstance(other, Projector):
+            wu = np.sum(np.conjugate(self.w) * other.u, axis=-1)
+            return Projector(self.u * wu[..., None], other.w)
+        return Projector(self.u, other.apply_adjoint(self.w))
+
+
+def compose(elements):
+    """
+    Return the product of a sequence of elements.
+
+    Light passes through elements[0] first, so the result is
+    elements[-1] @ ... @ elements[0].
+
+    Args:
+        elements: sequence of structured elements
+    Returns:
+        structured element for the whole sequence
+    """
+    return functools.reduce(lambda total, element: element @ total, elements)
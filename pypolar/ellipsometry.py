@@ -0,0 +1,386 @@
+# pylint: disable=invalid-name
+# pylint: disable=too-many-arguments
+# pylint: disable=too-many-locals
+# pylint: disable=too-many-instance-attributes
+"""
+Batched routines for analyzing ellipsometer measurements.
+
+The measured ellipsometer parameter is rho = tan(psi)*exp(1j*Delta) with the
+same sign conventions as pypolar.fresnel.ellipsometry_rho().
+
+fit_film() fits the thickness and complex index m = n - 1j*k of a single
+film on a known substrate.  All measurement points are fitted at once by a
+vectorized Levenberg-Marquardt iteration that uses analytic derivatives of
+the Airy (thin-film) reflection coefficients, which makes it practical to
+fit tens of thousands of points from a wafer map together::
+
+    import numpy as np
+    import pypolar.ellipsometry as ellipsometry
+
+    # rho has shape (points, angles)
+    theta_i = np.radians([65, 70, 75])
+    fit = ellipsometry.fit_film(rho, theta_i, 632.8, 3.88-0.02j, (100, 1.46, 0))
+    thickness = np.where(fit.converged, fit.thickness, np.nan)
+
+Demodulator accumulates rotating-analyzer samples as they arrive and can
+report Delta and tan(psi) after every chunk, optionally over a sliding
+window of the most recent samples::
+
+    demodulator = ellipsometry.Demodulator(P=np.radians(45), window=360)
+    for phi, signal in instrument:
+        demodulator.update(phi, signal)
+        Delta, tanpsi = demodulator.parameters()
+"""
+
+from collections import namedtuple
+
+import numpy as np
+import pypolar.fresnel
+
+__all__ = ('fit_film',
+           'FilmFit',
+           'Demodulator')
+
+
+FilmFit = namedtuple('FilmFit',
+                     ['thickness',
+                      'n',
+                      'k',
+                      'converged',
+                      'cost',
+                      'iterations'])
+
+
+def _airy(eta0, eta1, eta_sub, X):
+    """
+    Return the Airy reflection amplitude of one film and its derivatives.
+
+    Args:
+        eta0, eta1, eta_sub: admittances of ambient, film and substrate
+        X: round trip phase factor exp(-2j*beta) of the film
+    Returns:
+        r, dr/deta1 and dr/dX
+    """
+    a = (eta0 - eta1) / (eta0 + eta1)
+    b = (eta1 - eta_sub) / (eta1 + eta_sub)
+    denom = 1 + a * b * X
+    r = (a + b * X) / denom
+    dr_da = (1 - (b * X)**2) / denom**2
+    dr_db = X * (1 - a * a) / denom**2
+    dr_dX = b * (1 - a * a) / denom**2
+    da_deta1 = -2 * eta0 / (eta0 + eta1)**2
+    db_deta1 = 2 * eta_sub / (eta1 + eta_sub)**2
+    return r, dr_da * da_deta1 + dr_db * db_deta1, dr_dX
+
+
+def _film_rho(thickness, m, m_substrate, theta_i, lambda0):
+    """
+    Return rho of a single film and its derivatives.
+
+    Args:
+        thickness: film thickness (same units as lambda0)
+        m:         complex film index n - 1j*k
+        m_substrate, theta_i, lambda0: measurement conditions
+    Returns:
+        rho, drho/dthickness and drho/dm (complex derivative)
+    """
+    c = np.cos(theta_i)
+    s = np.sin(theta_i)
+    xi = pypolar.fresnel.m_cos_theta_t(m, s)
+    xi_sub = pypolar.fresnel.m_cos_theta_t(m_substrate, s)
+    dxi_dm = m / xi
+
+    k0 = 2 * np.pi / lambda0
+    X = np.exp(-2j * k0 * thickness * xi)
+    dX_dxi = -2j * k0 * thickness * X
+    dX_dd = -2j * k0 * xi * X
+
+    # perpendicular: eta = m*cos(theta)
+    rs, drs_deta, drs_dX = _airy(c, xi, xi_sub, X)
+    drs_dm = drs_deta * dxi_dm + drs_dX * dX_dxi * dxi_dm
+    drs_dd = drs_dX * dX_dd
+
+    # parallel: eta = cos(theta)/m, the sign convention of fresnel.r_par()
+    mm = m * m
+    eta_p = xi / mm
+    deta_p_dm = dxi_dm / mm - 2 * xi / (mm * m)
+    rp, drp_deta, drp_dX = _airy(c, eta_p, xi_sub / (m_substrate * m_substrate), X)
+    drp_dm = drp_deta * deta_p_dm + drp_dX * dX_dxi * dxi_dm
+    drp_dd = drp_dX * dX_dd
+
+    rho = rp / rs
+    drho_dd = rho * (drp_dd / rp - drs_dd / rs)
+    drho_dm = rho * (drp_dm / rp - drs_dm / rs)
+    return rho, drho_dd, drho_dm
+
+
+def _residuals(x, rho, m_substrate, theta_i, lambda0):
+    """
+    Return the real residual vectors and Jacobians for parameters x.
+
+    Args:
+        x: parameters (thickness, n, k) with shape (P, 3)
+        rho, m_substrate, theta_i, lambda0: arrays with shape (P, K)
+    Returns:
+        residuals (P, 2K) and Jacobians (P, 2K, 3)
+    """
+    thickness = x[:, 0:1]
+    m = x[:, 1:2] - 1j * x[:, 2:3]
+    with np.errstate(all='ignore'):
+        model, drho_dd, drho_dm = _film_rho(thickness, m, m_substrate, theta_i, lambda0)
+    diff = model - rho
+    res = np.concatenate((diff.real, diff.imag), axis=-1)
+
+    # m = n - 1j*k so d/dn = d/dm and d/dk = -1j*d/dm
+    dcols = np.stack((drho_dd, drho_dm, -1j * drho_dm), axis=-1)
+    jac = np.concatenate((dcols.real, dcols.imag), axis=-2)
+    return res, jac
+
+
+def _levenberg_marquardt(x, rho, m_substrate, theta_i, lambda0, vary, max_iter, tol,
+                         max_cost):
+    """
+    Fit every row of x simultaneously.
+
+    A point stops iterating once its cost or step becomes negligible, but
+    it is only reported as converged when its final cost is at most
+    max_cost per measurement, however the iteration ended.
+
+    Returns:
+        fitted parameters, convergence flags, final cost and iteration counts
+    """
+    P = x.shape[0]
+    x = x.copy()
+    damping = np.full(P, 1e-3)
+    iterations = np.zeros(P, dtype=int)
+    fixed = np.diag(~np.asarray(vary)).astype(float)
+
+    res, jac = _residuals(x, rho, m_substrate, theta_i, lambda0)
+    cost = np.sum(res**2, axis=-1)
+    active = np.arange(P)
+
+    for _ in range(max_iter):
+        if active.size == 0:
+            break
+        r = res[active]
+        J = jac[active] * np.asarray(vary)
+        A = np.einsum('pki,pkj->pij', J, J)
+        g = np.einsum('pki,pk->pi', J, r)
+        diag = np.einsum('pii->pi', A)
+        A_damped = A + (damping[active, None] * (diag + 1e-12))[..., None] * np.identity(3) + fixed
+        step = -np.linalg.solve(A_damped, g[..., None])[..., 0]
+
+        trial = x[active] + step
+        trial = np.maximum(trial, [0, 1e-3, 0])
+        trial_res, trial_jac = _residuals(trial, rho[active], m_substrate[active],
+                                          theta_i[active], lambda0[active])
+        trial_cost = np.sum(trial_res**2, axis=-1)
+        iterations[active] += 1
+
+        better = trial_cost < cost[active]
+        accepted = active[better]
+        x[accepted] = trial[better]
+        res[accepted] = trial_res[better]
+        jac[accepted] = trial_jac[better]
+        small_step = np.all(np.abs(step) <= tol * (np.abs(x[active]) + tol), axis=-1)
+        small_change = np.abs(cost[active] - trial_cost) <= tol * cost[active]
+        cost[accepted] = trial_cost[better]
+        damping[active] = np.where(better, damping[active] / 10, damping[active] * 10)
+
+        done = (cost[active] <= tol**2) | (better & (small_step | small_change))
+        done |= damping[active] > 1e12
+        active = active[~done]
+
+    converged = cost <= max_cost * rho.shape[-1]
+    return x, converged, cost, iterations
+
+
+def fit_film(rho, theta_i, lambda0, m_substrate, x0, vary=(True, True, True),
+             max_iter=100, tol=1e-10, max_cost=1e-10, warm_start=10):
+    """
+    Fit film thickness and index to ellipsometer measurements at many points.
+
+    Each point may have K measurements (for example several angles or
+    wavelengths).  A free thickness, n and k need at least two measurements
+    per point; with a single measurement keep one parameter fixed with vary.
+
+    A point is reported as converged when the mean squared |rho| residual
+    of its fit is at most max_cost.  Wrong local minima (for example a
+    thickness one interference order away) typically leave residuals of
+    1e-6 or more, so max_cost should be set close to the variance of the
+    measurement noise of rho; the default suits noise-free or very clean
+    data.
+
+    Points that do not converge are restarted from the solution of the
+    nearest converged point before and then after them in scan order, which
+    is the usual ordering of wafer maps.
+
+    Args:
+        rho :         measured tan(psi)*exp(1j*Delta) with shape (P, K) or (P,)  [-]
+        theta_i :     incidence angles, broadcast to (P, K)                      [radians]
+        lambda0 :     vacuum wavelengths, broadcast to (P, K)                    [-]
+        m_substrate : complex substrate index, broadcast to (P, K)               [-]
+        x0 :          initial (thickness, n, k), shape (3,) or (P, 3)            [-]
+        vary :        which of (thickness, n, k) are fitted
+        max_iter :    maximum number of iterations
+        tol :         relative tolerance on the parameters and cost
+        max_cost :    largest mean squared |rho| residual of a converged point,
+                      about the variance of the noise in rho
+        warm_start :  number of forward and backward restart passes
+    Returns:
+        FilmFit named tuple with thickness, n, k, converged, cost and
+        iterations for every point
+    """
+    rho = np.asarray(rho, dtype=complex)
+    if rho.ndim == 1:
+        rho = rho[:, None]
+    shape = rho.shape
+    theta_i = np.broadcast_to(theta_i, shape)
+    lambda0 = np.broadcast_to(lambda0, shape)
+    m_substrate = np.broadcast_to(m_substrate, shape).astype(complex)
+    x = np.array(np.broadcast_to(x0, (shape[0], 3)), dtype=float)
+
+    x, converged, cost, iterations = _levenberg_marquardt(
+        x, rho, m_substrate, theta_i, lambda0, vary, max_iter, tol, max_cost)
+
+    # restart failed points from the nearest converged point in scan order,
+    # alternating forward and backward passes while points keep converging
+    position = np.arange(shape[0])
+    stale = 0
+    for order in (position, position[::-1]) * warm_start:
+        if converged.all() or not converged.any() or stale == 2:
+            break
+        last = np.maximum.accumulate(np.where(converged[order], position, -1))
+        failed = ~converged[order] & (last >= 0)
+        retry = order[failed]
+        source = order[last[failed]]
+        x_retry, ok, c_retry, n_retry = _levenberg_marquardt(
+            x[source], rho[retry], m_substrate[retry], theta_i[retry],
+            lambda0[retry], vary, max_iter, tol, max_cost)
+        x[retry[ok]] = x_retry[ok]
+        converged[retry] = ok
+        cost[retry[ok]] = c_retry[ok]
+        iterations[retry] += n_retry
+        stale = 0 if ok.any() else stale + 1
+
+    return FilmFit(thickness=x[:, 0], n=x[:, 1], k=x[:, 2],
+                   converged=converged, cost=cost, iterations=iterations)
+
+
+def _analyzer_basis(phi):
+    """Return the functions 1, sin(2*phi) and cos(2*phi) with shape (n, 3)."""
+    phi = np.asarray(phi, dtype=float)
+    return np.stack((np.ones_like(phi), np.sin(2 * phi), np.cos(2 * phi)), axis=-1)
+
+
+class Demodulator():
+    """
+    Streaming demodulator for a rotating-analyzer ellipsometer.
+
+    The signal is fitted to I_DC + I_S*sin(2*phi) + I_C*cos(2*phi) by least
+    squares.  Only the 3x3 normal matrix and the three projections of the
+    signal are kept, so each update costs O(chunk) work and the memory does
+    not grow with the number of samples.  Samples need not cover whole
+    sweeps or be evenly spaced; for whole, evenly spaced sweeps the result
+    equals pypolar.fresnel.ellipsometry_parameters().
+
+    With a window only the most recent samples are used.  These are kept
+    in a ring buffer so that evicted samples can be removed from the sums,
+    and the sums are rebuilt from the buffer every time it wraps around to
+    keep rounding errors from accumulating.
+
+    Several detector channels are demodulated together by passing signal
+    chunks with shape (..., n) for n analyzer angles.
+    """
+
+    def __init__(self, P, window=None):
+        """
+        Create a demodulator.
+
+        Args:
+            P :      incident polarization azimuthal angle        [radians]
+            window : number of most recent samples to use, or None for all
+        """
+        self.P = P
+        self.window = window
+        self.reset()
+
+    def reset(self):
+        """Discard all accumulated samples."""
+        self.count = 0
+        self._normal = np.zeros((3, 3))
+        self._moments = None
+        self._basis = None
+        self._signal = None
+        self._next = 0
+
+    def update(self, phi, signal):
+        """
+        Add a chunk of samples.
+
+        Args:
+            phi :    analyzer angle or array of n angles          [radians]
+            signal : intensities with shape (..., n), or (...) for one angle  [AU]
+        """
+        basis = _analyzer_basis(np.atleast_1d(phi))
+        signal = np.asarray(signal, dtype=float)
+        if np.ndim(phi) == 0:
+            signal = signal[..., None]
+        n = basis.shape[0]
+        if self._moments is None:
+            self._moments = np.zeros(signal.shape[:-1] + (3,))
+
+        if self.window is None:
+            self._normal += basis.T @ basis
+            self._moments += signal @ basis
+            self.count += n
+            return
+
+        if self._basis is None:
+            self._basis = np.zeros((self.window, 3))
+            self._signal = np.zeros(signal.shape[:-1] + (self.window,))
+        if n >= self.window:
+            basis = basis[-self.window:]
+            signal = signal[..., -self.window:]
+            n = self.window
+
+        slots = (self._next + np.arange(n)) % self.window
+        old_basis = self._basis[slots]
+        self._normal -= old_basis.T @ old_basis
+        self._moments -= self._signal[..., slots] @ old_basis
+        self._basis[slots] = basis
+        self._signal[..., slots] = signal
+        self._normal += basis.T @ basis
+        self._moments += signal @ basis
+
+        self.count = min(self.count + n, self.window)
+        wrapped = self._next + n >= self.window
+        self._next = (self._next + n) % self.window
+        if wrapped:
+            self._normal = self._basis.T @ self._basis
+            self._moments = self._signal @ self._basis
+
+    def coefficients(self):
+        """
+        Return the Fourier coefficients of the accumulated signal.
+
+        At least three distinct analyzer angles (modulo pi) are needed.
+
+        Returns:
+            I_DC, I_S, I_C with the shape of the signal channels
+        """
+        if self.count == 0:
+            raise ValueError("no samples have been added")
+        # the normal matrix is symmetric
+        coefficients = self._moments @ np.linalg.inv(self._normal)
+        return tuple(np.moveaxis(coefficients, -1, 0))
+
+    def parameters(self):
+        """
+        Return the ellipsometer parameters of the accumulated signal.
+
+        Returns:
+            Delta, tan(psi) with the shape of the signal channels
+        """
+        I_DC, I_S, I_C = self.coefficients()
+        return pypolar.fresnel.fourier_to_ellipsometry(I_DC, I_S, I_C, self.P)
@@ -2,17 +2,34 @@
 """
 Useful basic routines for managing Fresnel reflection.
 
+All routines broadcast over arrays of m and theta_i, so a table of
+indices with shape (n, 1) and angles with shape (k,) gives (n, k) results.
+
+Thin films on a substrate are handled with characteristic (transfer)
+matrices by the film_* routines.  The films are passed as sequences with
+one entry per layer, so a single film with per-point arrays m and d is
+passed as [m], [d].
+
+FresnelTable tabulates all coefficients of one material on a fine angle
+grid and interpolates them, which is much cheaper than the exact formulas
+when the same index is evaluated at many angles.
+
 To Do
-    * Make sure routines work for arrays of m or of theta_i
-    * add ellipsometry routines for one layer
+    * add transmission through thin films
 
 Scott Prahl
 Apr 2018
 """
 
+from collections import namedtuple
+
 import numpy as np
+import pypolar.backend
 
-__all__ = ('r_par',
+__all__ = ('m_cos_theta_t',
+           'coefficients',
+           'FresnelCoefficients',
+           'r_par',
            'r_per',
            't_par',
            't_per',
@@ -23,8 +40,128 @@ __all__ = ('r_par',
            'R_unpolarized',
            'T_unpolarized',
            'ellipsometry_rho',
+           'film_characteristic_matrix',
+           'film_r_par',
+           'film_r_per',
+           'film_R_par',
+           'film_R_per',
+           'film_ellipsometry_rho',
            'ellipsometry_index',
-           'ellipsometry_parameters')
+           'ellipsometry_parameters',
+           'fourier_to_ellipsometry',
+           'FresnelTable')
+
+
+def m_cos_theta_t(m, s):
+    """
+    Calculate m*cos(theta_t) for the transmitted wave.
+
+    For non-absorbing media the conjugate root is chosen so that beyond
+    the critical angle the transmitted wave decays.  The choice is made
+    element by element so that m may be an array.
+
+    Args:
+        m : complex index of refraction       [-]
+        s : sine of the incidence angle       [-]
+    Returns:
+        m*cos(theta_t)                        [-]
+    """
+    d = np.sqrt(m * m - s * s, dtype=complex)
+    return np.where(np.imag(m) == 0, np.conjugate(d), d)
+
+
+def _compiled_amplitudes(m, theta_i):
+    """
+    Return r_par, r_per, t_par, t_per and d/c from the compiled backend.
+
+    Returns:
+        tuple of complex arrays, or None when the NumPy backend is in use
+    """
+    kernels = pypolar.backend.kernels()
+    if kernels is None:
+        return None
+    return kernels.fresnel_amplitudes(m, theta_i)
+
+
+def _compiled_powers(m, theta_i):
+    """
+    Return R_par, R_per, T_par and T_per from the compiled backend.
+
+    Returns:
+        tuple of real arrays, or None when the NumPy backend is in use
+    """
+    kernels = pypolar.backend.kernels()
+    if kernels is None:
+        return None
+    return kernels.fresnel_powers(m, theta_i)
+
+
+def _r_par_per(m, theta_i):
+    """
+    Calculate both reflected amplitudes from one set of intermediate terms.
+
+    Args:
+        m :       complex index of refraction   [-]
+        theta_i : incidence angle from normal   [radians]
+    Returns:
+        complex r_par and r_per                 [-]
+    """
+    amplitudes = _compiled_amplitudes(m, theta_i)
+    if amplitudes is not None:
+        return amplitudes[:2]
+    c = np.cos(theta_i)
+    d = m_cos_theta_t(m, np.sin(theta_i))
+    mmc = m * m * c
+    return (mmc - d) / (mmc + d), (c - d) / (c + d)
+
+
+FresnelCoefficients = namedtuple('FresnelCoefficients',
+                                 ['r_par',
+                                  'r_per',
+                                  't_par',
+                                  't_per',
+                                  'R_par',
+                                  'R_per',
+                                  'T_par',
+                                  'T_per'])
+
+
+def coefficients(m, theta_i):
+    """
+    Calculate all the Fresnel amplitude and power coefficients at once.
+
+    The values are the same as those returned by r_par(), r_per(),
+    t_par(), t_per(), R_par(), R_per(), T_par() and T_per(), but cos,
+    sin and the complex square root are only evaluated once.
+
+    Args:
+        m :       complex index of refraction   [-]
+        theta_i : incidence angle from normal   [radians]
+    Returns:
+        FresnelCoefficients named tuple         [-]
+    """
+    amplitudes = _compiled_amplitudes(m, theta_i)
+    if amplitudes is not None:
+        rp, rs, tp, ts, d_c = amplitudes
+    else:
+        c = np.cos(theta_i)
+        d = m_cos_theta_t(m, np.sin(theta_i))
+        mmc = m * m * c
+        p_denom = mmc + d
+        s_denom = c + d
+        rp = (mmc - d) / p_denom
+        rs = (c - d) / s_denom
+        tp = 2 * c * m / p_denom
+        ts = 2 * c / s_denom
+        d_c = d / c
+    return FresnelCoefficients(r_par=np.real_if_close(rp),
+                               r_per=np.real_if_close(rs),
+                               t_par=np.real_if_close(tp),
+                               t_per=np.real_if_close(ts),
+                               R_par=abs(rp)**2,
+                               R_per=abs(rs)**2,
+                               T_par=np.real(d_c * abs(tp)**2),
+                               T_per=np.real(d_c * abs(ts)**2))
 
 
 def r_par(m, theta_i):
@@ -37,11 +174,12 @@ def r_par(m, theta_i):
     Returns:
         reflected fraction of parallel field    [-]
     """
+    amplitudes = _compiled_amplitudes(m, theta_i)
+    if amplitudes is not None:
+        return np.real_if_close(amplitudes[0])
     c = m * m * np.cos(theta_i)
     s = np.sin(theta_i)
-    d = np.sqrt(m * m - s * s, dtype=np.complex) # m*cos(theta_t)
-    if m.imag == 0:
-        d = np.conjugate(d)
+    d = m_cos_theta_t(m, s)
     rp = (c - d) / (c + d)
     return np.real_if_close(rp)
 
@@ -56,11 +194,12 @@ def r_per(m, theta_i):
     Returns:
         reflected fraction of perpendicular field [-]
     """
+    amplitudes = _compiled_amplitudes(m, theta_i)
+    if amplitudes is not None:
+        return np.real_if_close(amplitudes[1])
     c = np.cos(theta_i)
     s = np.sin(theta_i)
-    d = np.sqrt(m * m - s * s, dtype=np.complex) # m*cos(theta_t)
-    if m.imag == 0:
-        d = np.conjugate(d)
+    d = m_cos_theta_t(m, s)
     rs = (c - d) / (c + d)
     return np.real_if_close(rs)
 
@@ -75,11 +214,12 @@ def t_par(m, theta_i):
     Returns:
         transmitted fraction of parallel field [-]
     """
+    amplitudes = _compiled_amplitudes(m, theta_i)
+    if amplitudes is not None:
+        return np.real_if_close(amplitudes[2])
     c = np.cos(theta_i)
     s = np.sin(theta_i)
-    d = np.sqrt(m * m - s * s, dtype=np.complex) # m*cos(theta_t)
-    if m.imag == 0:
-        d = np.conjugate(d)
+    d = m_cos_theta_t(m, s)
     tp = 2 * c * m / (m * m * c + d)
     return np.real_if_close(tp)
 
@@ -94,11 +234,12 @@ def t_per(m, theta_i):
     Returns:
         transmitted fraction of perpendicular field [-]
     """
+    amplitudes = _compiled_amplitudes(m, theta_i)
+    if amplitudes is not None:
+        return np.real_if_close(amplitudes[3])
     c = np.cos(theta_i)
     s = np.sin(theta_i)
-    d = np.sqrt(m * m - s * s, dtype=np.complex) # m*cos(theta_t)
-    if m.imag == 0:
-        d = np.conjugate(d)
+    d = m_cos_theta_t(m, s)
     ts = 2 * c / (c + d)
     return np.real_if_close(ts)
 
@@ -116,6 +257,9 @@ def R_par(m, theta_i):
     Returns:
         reflected power                       [-]
     """
+    powers = _compiled_powers(m, theta_i)
+    if powers is not None:
+        return powers[0]
     return abs(r_par(m, theta_i))**2
 
 
@@ -132,6 +276,9 @@ def R_per(m, theta_i):
     Returns:
         reflected irradiance                  [-]
     """
+    powers = _compiled_powers(m, theta_i)
+    if powers is not None:
+        return powers[1]
     return abs(r_per(m, theta_i))**2
 
 
@@ -148,9 +295,12 @@ def T_par(m, theta_i):
     Returns:
         transmitted irradiance                [-]
     """
+    powers = _compiled_powers(m, theta_i)
+    if powers is not None:
+        return powers[2]
     c = np.cos(theta_i)
     s = np.sin(theta_i)
-    d = np.sqrt(m * m - s * s, dtype=np.complex) # m*cos(theta_t)
+    d = m_cos_theta_t(m, s)
     tp = 2 * c * m / (m * m * c + d)
     return np.real(d / c * abs(tp)**2)
 
@@ -168,9 +318,12 @@ def T_per(m, theta_i):
     Returns:
         transmitted field amplitude           [-]
     """
+    powers = _compiled_powers(m, theta_i)
+    if powers is not None:
+        return powers[3]
     c = np.cos(theta_i)
     s = np.sin(theta_i)
-    d = np.sqrt(m * m - s * s, dtype=np.complex) # m*cos(theta_t)
+    d = m_cos_theta_t(m, s)
     ts = 2 * c / (c + d)
     return np.real(d / c * abs(ts)**2)
 
@@ -188,7 +341,11 @@ def R_unpolarized(m, theta_i):
     Returns:
         reflected irradiance                  [-]
     """
-    return (R_par(m, theta_i) + R_per(m, theta_i)) / 2
+    powers = _compiled_powers(m, theta_i)
+    if powers is not None:
+        return (powers[0] + powers[1]) / 2
+    rp, rs = _r_par_per(m, theta_i)
+    return (abs(rp)**2 + abs(rs)**2) / 2
 
 
 def T_unpolarized(m, theta_i):
@@ -204,7 +361,14 @@ def T_unpolarized(m, theta_i):
     Returns:
         reflected irradiance                  [-]
     """
-    return (T_par(m, theta_i) + T_per(m, theta_i)) / 2
+    powers = _compiled_powers(m, theta_i)
+    if powers is not None:
+        return (powers[2] + powers[3]) / 2
+    c = np.cos(theta_i)
+    d = m_cos_theta_t(m, np.sin(theta_i))
+    tp = 2 * c * m / (m * m * c + d)
+    ts = 2 * c / (c + d)
+    return np.real(d / c * (abs(tp)**2 + abs(ts)**2)) / 2
 
 
 def ellipsometry_rho(m, theta_i):
@@ -217,7 +381,199 @@ def ellipsometry_rho(m, theta_i):
     Returns:
         ellipsometer parameter rho            [-]
     """
-    return r_par(m, theta_i) / r_per(m, theta_i)
+    rp, rs = _r_par_per(m, theta_i)
+    return np.real_if_close(rp / rs)
+
+
+def _film_layers(m_layers, d_layers):
+    """Return the film indices and thicknesses as sequences of layers."""
+    if np.ndim(d_layers) == 0:
+        return [m_layers], [d_layers]
+    if np.ndim(m_layers) > 1 and not isinstance(m_layers, (list, tuple)):
+        raise ValueError("m_layers is a multidimensional array; pass the layers "
+                         "as a list, e.g. [m], [d] for a single film")
+    if len(m_layers) != len(d_layers):
+        raise ValueError("m_layers and d_layers must have the same number of layers "
+                         "(%d != %d); wrap a single film as [m], [d]"
+                         % (len(m_layers), len(d_layers)))
+    return m_layers, d_layers
+
+
+def _tilted_admittances(m, d):
+    """
+    Return the tilted admittances for parallel and perpendicular fields.
+
+    The parallel value d/m**2 gives reflection amplitudes with the same
+    sign convention as r_par().
+
+    Args:
+        m : complex index of refraction       [-]
+        d : m*cos(theta) in the medium        [-]
+    Returns:
+        array with parallel and perpendicular values along the last axis
+    """
+    return np.stack(np.broadcast_arrays(d / (m * m), d), axis=-1)
+
+
+def _film_layer_terms(m_layers, d_layers, lambda0, s):
+    """
+    Yield cos(beta), sin(beta) and the admittances of each film layer.
+
+    The last axis of each value holds the parallel and perpendicular terms.
+    """
+    m_layers, d_layers = _film_layers(m_layers, d_layers)
+    for m, thickness in zip(m_layers, d_layers):
+        d = m_cos_theta_t(m, s)
+        beta = 2 * np.pi * thickness * d / lambda0
+        yield np.cos(beta)[..., None], np.sin(beta)[..., None], _tilted_admittances(m, d)
+
+
+def film_characteristic_matrix(m_layers, d_layers, lambda0, theta_i):
+    """
+    Calculate the characteristic matrix of a stack of thin films.
+
+    Each layer contributes the matrix
+
+        [[cos(beta), 1j*sin(beta)/eta], [1j*eta*sin(beta), cos(beta)]]
+
+    with beta = 2*pi*d*m*cos(theta)/lambda0.  Both polarizations and every
+    wavelength and angle are handled at once; the layers are multiplied
+    with elementwise 2x2 products over the whole batch.
+
+    Args:
+        m_layers : sequence of film indices from the incident side, [m] for one film [-]
+        d_layers : sequence of film thicknesses (units of lambda0), [d] for one film [-]
+        lambda0 :  vacuum wavelength                                            [-]
+        theta_i :  incidence angle from normal                                  [radians]
+    Returns:
+        array (..., 2, 2, 2) with parallel [..., 0, :, :] and
+        perpendicular [..., 1, :, :] matrices                                   [-]
+    """
+    s = np.sin(theta_i)
+    M00, M01, M10, M11 = 1, 0, 0, 1
+    for cb, sb, eta in _film_layer_terms(m_layers, d_layers, lambda0, s):
+        L01 = 1j * sb / eta
+        L10 = 1j * sb * eta
+        M00, M01 = M00 * cb + M01 * L10, M00 * L01 + M01 * cb
+        M10, M11 = M10 * cb + M11 * L10, M10 * L01 + M11 * cb
+    shape = np.broadcast(M00, M01, M10, M11).shape
+    M = np.empty(shape + (2, 2), dtype=complex)
+    M[..., 0, 0] = M00
+    M[..., 0, 1] = M01
+    M[..., 1, 0] = M10
+    M[..., 1, 1] = M11
+    return M
+
+
+def _film_r_par_per(m_layers, d_layers, m_substrate, lambda0, theta_i):
+    """
+    Return the complex reflected amplitudes of a film-covered substrate.
+
+    Only the product of the characteristic matrices with the substrate
+    vector [1, eta_sub] is needed, so it is accumulated from the substrate
+    side as a vector [B, C] instead of forming the full matrix product.
+    """
+    c = np.cos(theta_i)
+    s = np.sin(theta_i)
+    eta0 = c[..., None]
+    B = 1
+    C = _tilted_admittances(m_substrate, m_cos_theta_t(m_substrate, s))
+    layers = list(_film_layer_terms(m_layers, d_layers, lambda0, s))
+    for cb, sb, eta in reversed(layers):
+        B, C = cb * B + 1j * sb * C / eta, 1j * sb * eta * B + cb * C
+    r = (eta0 * B - C) / (eta0 * B + C)
+    return r[..., 0], r[..., 1]
+
+
+def film_r_par(m_layers, d_layers, m_substrate, lambda0, theta_i):
+    """
+    Calculate the reflected amplitude of a film-covered substrate (parallel).
+
+    With no films (or films of zero thickness) this equals r_par().
+
+    Args:
+        m_layers :    sequence of film indices from the incident side, [m] for one film [-]
+        d_layers :    sequence of film thicknesses (units of lambda0), [d] for one film [-]
+        m_substrate : complex index of refraction of the substrate                 [-]
+        lambda0 :     vacuum wavelength                                            [-]
+        theta_i :     incidence angle from normal                                  [radians]
+    Returns:
+        reflected fraction of parallel field                                       [-]
+    """
+    rp, _ = _film_r_par_per(m_layers, d_layers, m_substrate, lambda0, theta_i)
+    return np.real_if_close(rp)
+
+
+def film_r_per(m_layers, d_layers, m_substrate, lambda0, theta_i):
+    """
+    Calculate the reflected amplitude of a film-covered substrate (perpendicular).
+
+    With no films (or films of zero thickness) this equals r_per().
+
+    Args:
+        m_layers :    sequence of film indices from the incident side, [m] for one film [-]
+        d_layers :    sequence of film thicknesses (units of lambda0), [d] for one film [-]
+        m_substrate : complex index of refraction of the substrate                 [-]
+        lambda0 :     vacuum wavelength                                            [-]
+        theta_i :     incidence angle from normal                                  [radians]
+    Returns:
+        reflected fraction of perpendicular field                                  [-]
+    """
+    _, rs = _film_r_par_per(m_layers, d_layers, m_substrate, lambda0, theta_i)
+    return np.real_if_close(rs)
+
+
+def film_R_par(m_layers, d_layers, m_substrate, lambda0, theta_i):
+    """
+    Fraction of parallel-polarized light reflected by a film-covered substrate.
+
+    Args:
+        m_layers :    sequence of film indices from the incident side, [m] for one film [-]
+        d_layers :    sequence of film thicknesses (units of lambda0), [d] for one film [-]
+        m_substrate : complex index of refraction of the substrate                 [-]
+        lambda0 :     vacuum wavelength                                            [-]
+        theta_i :     incidence angle from normal                                  [radians]
+    Returns:
+        reflected power                                                            [-]
+    """
+    rp, _ = _film_r_par_per(m_layers, d_layers, m_substrate, lambda0, theta_i)
+    return abs(rp)**2
+
+
+def film_R_per(m_layers, d_layers, m_substrate, lambda0, theta_i):
+    """
+    Fraction of perpendicular-polarized light reflected by a film-covered substrate.
+
+    Args:
+        m_layers :    sequence of film indices from the incident side, [m] for one film [-]
+        d_layers :    sequence of film thicknesses (units of lambda0), [d] for one film [-]
+        m_substrate : complex index of refraction of the substrate                 [-]
+        lambda0 :     vacuum wavelength                                            [-]
+        theta_i :     incidence angle from normal                                  [radians]
+    Returns:
+        reflected power                                                            [-]
+    """
+    _, rs = _film_r_par_per(m_layers, d_layers, m_substrate, lambda0, theta_i)
+    return abs(rs)**2
+
+
+def film_ellipsometry_rho(m_layers, d_layers, m_substrate, lambda0, theta_i):
+    """
+    Calculate the ellipsometer parameter rho for a film-covered substrate.
+
+    With no films (or films of zero thickness) this equals ellipsometry_rho().
+
+    Args:
+        m_layers :    sequence of film indices from the incident side, [m] for one film [-]
+        d_layers :    sequence of film thicknesses (units of lambda0), [d] for one film [-]
+        m_substrate : complex index of refraction of the substrate                 [-]
+        lambda0 :     vacuum wavelength                                            [-]
+        theta_i :     incidence angle from normal                                  [radians]
+    Returns:
+        ellipsometer parameter rho                                                 [-]
+    """
+    rp, rs = _film_r_par_per(m_layers, d_layers, m_substrate, lambda0, theta_i)
+    return np.real_if_close(rp / rs)
 
 
 def ellipsometry_index(rho, theta_i):
@@ -234,6 +590,23 @@ def ellipsometry_index(rho, theta_i):
     return np.tan(theta_i) * e_index
 
 
+def fourier_to_ellipsometry(I_DC, I_S, I_C, P):
+    """
+    Convert Fourier coefficients of an analyzer sweep to Delta and tan(psi).
+
+    Args:
+        I_DC, I_S, I_C - coefficients of 1, sin(2*phi), cos(2*phi)  [AU]
+        P              - incident polarization azimuthal angle   [radians]
+    Returns:
+        Delta, tan(psi)
+    """
+    tanP = np.tan(P)
+    arg = I_S / np.sqrt(abs(I_DC**2 - I_C**2)) * np.sign(tanP)
+    Delta = np.arccos(np.clip(arg, -1, 1))
+    tanpsi = np.sqrt(abs(I_DC + I_C) / abs(I_DC - I_C)) * np.abs(tanP)
+    return Delta, tanpsi
+
+
 def ellipsometry_parameters(phi, signal, P):
     """
     Recover ellipsometer parameters Delta and tan(psi).
@@ -242,24 +615,129 @@ def ellipsometry_parameters(phi, signal, P):
 
              I_DC + I_S*sin(2*phi)+I_C*cos(2*phi)
 
+    Many sweeps with the same analyzer angles are fitted at once by passing
+    signal with shape (..., len(phi)).
+
     Args:
         phi    - array of analyzer angles               [radians]
         signal - array of ellipsometer intensities      [AU]
         P      - incident polarization azimuthal angle  [radians]
+    Returns:
+        Delta, tan(psi) with the leading shape of signal
     """
-    I_DC = np.average(signal)
-    I_S = 2 * np.average(signal * np.sin(2 * phi))
-    I_C = 2 * np.average(signal * np.cos(2 * phi))
+    phi = np.asarray(phi)
+    projection = np.stack((np.ones_like(phi), 2 * np.sin(2 * phi), 2 * np.cos(2 * phi)),
+                          axis=-1) / phi.size
+    I_DC, I_S, I_C = np.moveaxis(np.asarray(signal) @ projection, -1, 0)
+    return fourier_to_ellipsometry(I_DC, I_S, I_C, P)
 
-    tanP = np.tan(P)
-    arg = I_S / np.sqrt(abs(I_DC**2 - I_C**2)) * np.sign(tanP)
-    if arg > 1:
-        Delta = 0
-    elif arg < -1:
-        Delta = np.pi
-    else:
-        Delta = np.arccos(arg)
 
-    tanpsi = np.sqrt(abs(I_DC + I_C) / abs(I_DC - I_C)) * np.abs(tanP)
+class FresnelTable():
+    """
+    Interpolation table of the Fresnel coefficients for one material.
 
-    return Delta, tanpsi
+    All the coefficients returned by coefficients() are tabulated on a
+    uniform grid of incidence angles between 0 and pi/2 and queries are
+    answered by linear interpolation.  When the table is built, the
+    interpolation error in the middle of every grid interval is measured
+    against the exact formulas.  Intervals where it exceeds tol (typically
+    around the critical angle, where the coefficients have a kink) are
+    flagged and queries falling in them use the exact formulas instead.
+
+    Example::
+
+        table = pypolar.fresnel.FresnelTable(1.5 - 0.01j)
+        R = table.R_par(theta)     # same as R_par(1.5 - 0.01j, theta)
+    """
+
+    def __init__(self, m, tol=1e-6, size=None):
+        """
+        Build the table.
+
+        Args:
+            m :    complex index of refraction                        [-]
+            tol :  largest allowed interpolation error                 [-]
+            size : number of grid intervals; by default it is doubled
+                   from 256 until fewer than 1% of them are flagged
+        """
+        self.m = m
+        self.tol = tol
+        sizes = [size] if size else [2**k for k in range(8, 17)]
+        for n in sizes:
+            theta = np.linspace(0, np.pi / 2, n + 1)
+            values = np.array(coefficients(m, theta), dtype=complex)
+            midpoint = np.array(coefficients(m, theta[:-1] + np.pi / 4 / n), dtype=complex)
+            error = np.max(abs(midpoint - (values[:, :-1] + values[:, 1:]) / 2), axis=0)
+            exact = error > tol
+            if np.count_nonzero(exact) < 0.01 * n:
+                break
+        self.size = n
+        self._scale = n / (np.pi / 2)
+        self._exact = exact
+
+        # value at the start of each interval and its slope, real if possible
+        tables = dict(zip(FresnelCoefficients._fields, values))
+        tables['R_unpolarized'] = (tables['R_par'] + tables['R_per']) / 2
+        tables['T_unpolarized'] = (tables['T_par'] + tables['T_per']) / 2
+        self._tables = {}
+        for name, v in tables.items():
+            v = np.real_if_close(v)
+            self._tables[name] = (v[:-1], np.diff(v))
+
+    def _lookup(self, name, theta_i):
+        """Return the coefficient computed by the function name at theta_i."""
+        shape = np.shape(theta_i)
+        theta = np.abs(np.atleast_1d(np.asarray(theta_i, dtype=float)))
+        x = theta * self._scale
+        i = x.astype(np.intp)
+        outside = i >= self.size
+        np.minimum(i, self.size - 1, out=i)
+        start, slope = self._tables[name]
+        result = start[i] + (x - i) * slope[i]
+
+        exact = self._exact[i] | outside
+        if exact.any():
+            exact_values = globals()[name](self.m, theta[exact])
+            result = result.astype(np.result_type(result, exact_values))
+            result[exact] = exact_values
+        return result.reshape(shape)[()]
+
+    def r_par(self, theta_i):
+        """Reflected amplitude for parallel polarized light, see r_par()."""
+        return np.real_if_close(self._lookup('r_par', theta_i))
+
+    def r_per(self, theta_i):
+        """Reflected amplitude for perpendicular polarized light, see r_per()."""
+        return np.real_if_close(self._lookup('r_per', theta_i))
+
+    def t_par(self, theta_i):
+        """Transmitted amplitude for parallel polarized light, see t_par()."""
+        return np.real_if_close(self._lookup('t_par', theta_i))
+
+    def t_per(self, theta_i):
+        """Transmitted amplitude for perpendicular polarized light, see t_per()."""
+        return np.real_if_close(self._lookup('t_per', theta_i))
+
+    def R_par(self, theta_i):
+        """Reflected fraction of parallel polarized light, see R_par()."""
+        return np.real(self._lookup('R_par', theta_i))
+
+    def R_per(self, theta_i):
+        """Reflected fraction of perpendicular polarized light, see R_per()."""
+        return np.real(self._lookup('R_per', theta_i))
+
+    def T_par(self, theta_i):
+        """Transmitted fraction of parallel polarized light, see T_par()."""
+        return np.real(self._lookup('T_par', theta_i))
+
+    def T_per(self, theta_i):
+        """Transmitted fraction of perpendicular polarized light, see T_per()."""
+        return np.real(self._lookup('T_per', theta_i))
+
+    def R_unpolarized(self, theta_i):
+        """Reflected fraction of unpolarized light, see R_unpolarized()."""
+        return np.real(self._lookup('R_unpolarized', theta_i))
+
+    def T_unpolarized(self, theta_i):
+        """Transmitted fraction of unpolarized light, see T_unpolarized()."""
+        return np.real(self._lookup('T_unpolarized', theta_i))
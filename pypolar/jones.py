@@ -19,10 +19,20 @@ Scott Prahl
 Apr 2020
 """
 
+import cmath
+import contextlib
+import contextvars
+import math
+from collections import namedtuple
+
 import numpy as np
+import pypolar.backend
 import pypolar.fresnel
 
 __all__ = ('use_alternate_convention',
+           'sign_convention',
+           'get_convention',
+           'is_alternate',
            'op_linear_polarizer',
            'op_retarder',
            'op_attenuator',
@@ -30,6 +40,7 @@ __all__ = ('use_alternate_convention',
            'op_rotation',
            'op_quarter_wave_plate',
            'op_half_wave_plate',
+           'op_retarder_stack',
            'op_fresnel_reflection',
            'op_fresnel_transmission',
            'field_linear',
@@ -47,9 +58,31 @@ __all__ = ('use_alternate_convention',
            'ellipticity_angle',
            'amplitude_ratio',
            'amplitude_ratio_angle',
+           'ellipse_parameters',
+           'EllipseParameters',
            'jones_op_to_mueller_op')
 
-alternate_sign_convention = False
+# process-wide convention set by use_alternate_convention() and the
+# per-context override set by sign_convention()
+_CONVENTIONS = ('default', 'alternate')
+_process_convention = 'default'
+_context_convention = contextvars.ContextVar('pypolar_sign_convention', default=None)
+
+# A maps the coherency vector of J ⊗ J* onto Stokes parameters.  The
+# product A (J ⊗ J*) A^-1 is linear in the 16 entries of J ⊗ J* and is
+# precomputed as a single 16x16 matrix acting on the flattened product.
+_A = np.array([[1, 0, 0, 1],
+               [1, 0, 0, -1],
+               [0, 1, 1, 0],
+               [0, 1j, -1j, 0]])
+_KRON_TO_MUELLER = np.einsum('ab,cd->bcad', _A, np.conjugate(_A.T) / 2).reshape(16, 16)
+
+# The Mueller entries are real, so only Re(K T) = Re(K) Re(T) - Im(K) Im(T)
+# is needed.  Viewing the complex K as interleaved (re, im) floats turns
+# this into one real product with a 32x16 matrix.
+_KRON_TO_MUELLER_REAL = np.empty((32, 16))
+_KRON_TO_MUELLER_REAL[0::2] = _KRON_TO_MUELLER.real
+_KRON_TO_MUELLER_REAL[1::2] = -_KRON_TO_MUELLER.imag
 
 def use_alternate_convention(state):
     """
@@ -65,45 +98,156 @@ def use_alternate_convention(state):
     Hecht (sometimes).
 
     Call this function once at the beginning and everything should
-    be just fine.
+    be just fine.  This changes the convention for the whole process;
+    use sign_convention() or the convention= argument to change it only
+    for one thread, task, or call.
+    """
+    global _process_convention
+    _process_convention = 'alternate' if state else 'default'
+
+
+def get_convention():
+    """Return the sign convention in effect, 'default' or 'alternate'."""
+    convention = _context_convention.get()
+    if convention is None:
+        return _process_convention
+    return convention
+
+
+@contextlib.contextmanager
+def sign_convention(convention):
+    """
+    Context manager that sets the sign convention for the current context.
+
+    The setting is local to the current thread (or asyncio task) so that
+    workloads using different conventions can run concurrently::
+
+        with pypolar.jones.sign_convention('alternate'):
+            R = pypolar.jones.op_quarter_wave_plate(0)
+
+    Args:
+        convention: 'default' or 'alternate'
+    """
+    token = _context_convention.set(_check_convention(convention))
+    try:
+        yield
+    finally:
+        _context_convention.reset(token)
+
+
+def _check_convention(convention):
+    """Return convention after making sure that it is a valid name."""
+    if convention not in _CONVENTIONS:
+        raise ValueError("convention must be 'default' or 'alternate', not %r" % (convention,))
+    return convention
+
+
+def is_alternate(convention=None):
+    """
+    Return True if the alternate sign convention applies.
+
+    Functions that take a convention= argument use this to resolve it.
+
+    Args:
+        convention: 'default', 'alternate', or None for get_convention()
+    """
+    if convention is None:
+        return get_convention() == 'alternate'
+    return _check_convention(convention) == 'alternate'
+
+
+def __getattr__(name):
+    """Keep alternate_sign_convention readable as a module attribute."""
+    if name == 'alternate_sign_convention':
+        return get_convention() == 'alternate'
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+
+def _empty_op(shape, dtype=float):
     """
-    global alternate_sign_convention
-    alternate_sign_convention = state
+    Allocate an uninitialized stack of 2x2 Jones operators.
+
+    Args:
+        shape: leading (broadcast) dimensions of the stack
+        dtype: data type of the operators
+    Returns:
+        array with shape (*shape, 2, 2)
+    """
+    return np.empty(tuple(shape) + (2, 2), dtype=dtype)
+
 
 def op_linear_polarizer(theta):
     """
     Jones matrix operator for a rotated linear polarizer.
 
     The polarizer has been rotated around a normal to its surface.
+    An array of angles returns a stack of operators with shape (..., 2, 2).
 
     Args:
         theta: rotation angle measured from the horizontal plane [radians]
     """
-    return np.array([[np.cos(theta)**2, np.sin(theta) * np.cos(theta)],
-                      [np.sin(theta) * np.cos(theta), np.sin(theta)**2]])
+    C = np.cos(theta)
+    S = np.sin(theta)
+    lp = _empty_op(np.shape(C))
+    lp[..., 0, 0] = C * C
+    lp[..., 0, 1] = S * C
+    lp[..., 1, 0] = lp[..., 0, 1]
+    lp[..., 1, 1] = S * S
+    return lp
+
+
+def _scalar_retarder(theta, delta, alternate):
+    """Return op_retarder() for a single theta and delta without array temporaries."""
+    if alternate:
+        theta = -theta
+    P = cmath.exp(0.5j * delta)
+    Q = cmath.exp(-0.5j * delta)
+    D = 2j * cmath.sin(0.5 * delta)
+    C = math.cos(theta)
+    S = math.sin(theta)
+    CC = C * C
+    SS = S * S
+    CSD = C * S * D
+    retarder = np.array([[CC * P + SS * Q, CSD],
+                         [CSD, CC * Q + SS * P]])
+    if alternate:
+        return np.conjugate(retarder, out=retarder)
+    return retarder
 
 
-def op_retarder(theta, delta):
+def op_retarder(theta, delta, convention=None):
     """
     Jones matrix operator for an rotated optical retarder.
 
     The retarder has been rotated around a normal to its surface.
+    Arrays of angles and retardances are broadcast against each other
+    and return a stack of operators with shape (..., 2, 2).
 
     Args:
         theta: rotation angle between fast-axis and the horizontal plane [radians]
         delta: phase delay introduced between fast and slow-axes         [radians]
-    """
-    if alternate_sign_convention:
-        theta *= -1
+        convention: 'default', 'alternate', or None for get_convention()
+    """
+    alternate = is_alternate(convention)
+    if np.ndim(theta) == 0 and np.ndim(delta) == 0:
+        return _scalar_retarder(theta, delta, alternate)
+    if alternate:
+        theta = np.negative(theta)
+    theta, delta = np.broadcast_arrays(theta, delta)
     P = np.exp(+delta / 2 * 1j)
-    Q = np.exp(-delta / 2 * 1j)
+    Q = np.conjugate(P) if np.isrealobj(delta) else np.exp(-delta / 2 * 1j)
     D = np.sin(delta / 2) * 2j
     C = np.cos(theta)
     S = np.sin(theta)
-    retarder = np.array([[C * C * P + S * S * Q, C * S * D],
-                         [C * S * D, C * C * Q + S * S * P]])
-    if alternate_sign_convention:
-        return np.conjugate(retarder)
+    CC = C * C
+    SS = S * S
+    retarder = _empty_op(theta.shape, complex)
+    retarder[..., 0, 0] = CC * P + SS * Q
+    retarder[..., 0, 1] = C * S * D
+    retarder[..., 1, 0] = retarder[..., 0, 1]
+    retarder[..., 1, 1] = CC * Q + SS * P
+    if alternate:
+        return np.conjugate(retarder, out=retarder)
     return retarder
 
 
@@ -112,13 +256,17 @@ def op_attenuator(t):
     Jones matrix operator for an isotropic optical attenuator.
 
     The transmittance t=I/I_0 is the fraction of light getting
-    through the attenuator or absorber.
+    through the attenuator or absorber.  An array of transmittances
+    returns a stack of operators with shape (..., 2, 2).
 
     Args:
         t: fraction of intensity getting through attenuator  [---]
     """
     f = np.sqrt(t)
-    return np.array([[f, 0], [0, f]])
+    att = np.zeros(np.shape(f) + (2, 2), dtype=f.dtype)
+    att[..., 0, 0] = f
+    att[..., 1, 1] = f
+    return att
 
 
 def op_mirror():
@@ -130,16 +278,24 @@ def op_rotation(theta):
     """
     Jones matrix operator to rotate light around the optical axis.
 
+    An array of angles returns a stack of operators with shape (..., 2, 2).
+
     Args:
         theta : angle of rotation around optical axis  [radians]
     Returns:
         2x2 matrix of the rotation operator           [-]
     """
-    return np.array([[np.cos(theta), np.sin(theta)],
-                     [-np.sin(theta), np.cos(theta)]])
+    C = np.cos(theta)
+    S = np.sin(theta)
+    rot = _empty_op(np.shape(C))
+    rot[..., 0, 0] = C
+    rot[..., 0, 1] = S
+    rot[..., 1, 0] = -S
+    rot[..., 1, 1] = C
+    return rot
 
 
-def op_quarter_wave_plate(theta):
+def op_quarter_wave_plate(theta, convention=None):
     """
     Jones matrix operator for an rotated quarter-wave plate.
 
@@ -147,13 +303,14 @@ def op_quarter_wave_plate(theta):
 
     Args:
         theta : angle from fast-axis to horizontal plane  [radians]
+        convention: 'default', 'alternate', or None for get_convention()
     Returns:
         2x2 matrix of the quarter-wave plate operator     [-]
     """
-    return op_retarder(theta, np.pi / 2)
+    return op_retarder(theta, np.pi / 2, convention)
 
 
-def op_half_wave_plate(theta):
+def op_half_wave_plate(theta, convention=None):
     """
     Jones matrix operator for a rotated half-wave plate.
 
@@ -162,24 +319,79 @@ def op_half_wave_plate(theta):
 
     Args:
         theta : angle from fast-axis to horizontal plane  [radians]
+        convention: 'default', 'alternate', or None for get_convention()
     Returns:
         2x2 matrix of the half-wave plate operator     [-]
     """
-    return op_retarder(theta, np.pi)
+    return op_retarder(theta, np.pi, convention)
+
+
+def _matmul_tree(ops):
+    """
+    Multiply a stack of operators by pairwise (tree) reduction.
+
+    Light passes through ops[..., 0, :, :] first, so the result is
+    ops[N-1] @ ... @ ops[0].  Each pass multiplies neighbouring pairs in
+    one batched matmul, so only about log2(N) passes are needed.
+
+    Args:
+        ops: operators with shape (..., N, n, n)
+    Returns:
+        product with shape (..., n, n)
+    """
+    while ops.shape[-3] > 1:
+        n = ops.shape[-3]
+        even = n - n % 2
+        product = ops[..., 1:even:2, :, :] @ ops[..., 0:even:2, :, :]
+        if n % 2:
+            product = np.concatenate((product, ops[..., -1:, :, :]), axis=-3)
+        ops = product
+    return ops[..., 0, :, :]
+
+
+def op_retarder_stack(theta, delta, convention=None):
+    """
+    Jones matrix operator for a stack of thin retarders.
+
+    This models stratified birefringent media such as twisted-nematic
+    liquid crystal cells or multilayer waveplates.  The layers lie along
+    the last axis of theta and delta and light enters through layer 0.
+    Any other (leading) axes, for example wavelength, are broadcast and
+    give a stack of operators with shape (..., 2, 2).
+
+    Args:
+        theta: fast-axis angle of each layer from the horizontal plane [radians]
+        delta: phase delay introduced by each layer                    [radians]
+        convention: 'default', 'alternate', or None for get_convention()
+    Returns:
+        2x2 matrix of the whole stack                                  [-]
+    """
+    layers = op_retarder(theta, delta, convention)
+    if layers.ndim < 3:
+        return layers
+    return _matmul_tree(layers)
 
 
 def op_fresnel_reflection(m, theta):
     """
     Jones matrix operator for Fresnel reflection at angle theta.
 
+    Arrays of m and theta are broadcast against each other and return
+    a stack of operators with shape (..., 2, 2).
+
     Args:
         m :     complex index of refraction   [-]
         theta : angle from normal to surface  [radians]
     Returns:
         2x2 matrix of the Fresnel transmission operator     [-]
     """
-    return np.array([[pypolar.fresnel.r_par(m, theta), 0],
-                     [0, pypolar.fresnel.r_per(m, theta)]])
+    rp = pypolar.fresnel.r_par(m, theta)
+    rs = pypolar.fresnel.r_per(m, theta)
+    shape = np.broadcast(rp, rs).shape
+    refl = np.zeros(shape + (2, 2), dtype=np.result_type(rp, rs))
+    refl[..., 0, 0] = rp
+    refl[..., 1, 1] = rs
+    return refl
 
 
 def op_fresnel_transmission(m, theta):
@@ -188,6 +400,9 @@ def op_fresnel_transmission(m, theta):
 
     *** THIS IS ALMOST CERTAINLY WRONG ***
 
+    Arrays of m and theta are broadcast against each other and return
+    a stack of operators with shape (..., 2, 2).
+
     Args:
         m :     complex index of refraction       [-]
         theta : angle from normal to surface      [radians]
@@ -195,30 +410,37 @@ def op_fresnel_transmission(m, theta):
         2x2 Fresnel transmission operator           [-]
     """
     c = np.cos(theta)
-    d = np.sqrt(m * m - np.sin(theta)**2, dtype=np.complex)
-    if m.imag == 0:
-        d = np.conjugate(d)
+    d = pypolar.fresnel.m_cos_theta_t(m, np.sin(theta))
     a = np.sqrt(d/c)
-    return a*np.array([[pypolar.fresnel.t_par(m, theta), 0], [0, pypolar.fresnel.t_per(m, theta)]])
+    tp = a * pypolar.fresnel.t_par(m, theta)
+    ts = a * pypolar.fresnel.t_per(m, theta)
+    trans = np.zeros(np.broadcast(tp, ts).shape + (2, 2), dtype=complex)
+    trans[..., 0, 0] = tp
+    trans[..., 1, 1] = ts
+    return trans
 
 
 def field_linear(theta):
-    """Jones vector for linear polarized light at angle theta from horizontal plane."""
-    return np.array([np.cos(theta), np.sin(theta)])
+    """
+    Jones vector for linear polarized light at angle theta from horizontal plane.
+
+    An array of angles gives an array of Jones vectors with shape (..., 2).
+    """
+    return np.stack((np.cos(theta), np.sin(theta)), axis=-1)
 
 
-def field_right_circular():
+def field_right_circular(convention=None):
     """Jones Vector for right circular polarized light."""
     J = 1 / np.sqrt(2) * np.array([1, 1j])
-    if alternate_sign_convention:
+    if is_alternate(convention):
         return np.conjugate(J)
     return J
 
 
-def field_left_circular():
+def field_left_circular(convention=None):
     """Jones Vector for left circular polarized light."""
     J = 1 / np.sqrt(2) * np.array([1, -1j])
-    if alternate_sign_convention:
+    if is_alternate(convention):
         return np.conjugate(J)
     return J
 
@@ -233,7 +455,7 @@ def field_vertical():
     return np.array([0, 1])
 
 
-def field_elliptical(azimuth, elliptic_angle, phi_x=0, E_0=1):
+def field_elliptical(azimuth, elliptic_angle, phi_x=0, E_0=1, convention=None):
     """
     Jones vector for elliptically polarized light.
 
@@ -244,19 +466,22 @@ def field_elliptical(azimuth, elliptic_angle, phi_x=0, E_0=1):
         ellipticity_angle: arctan(minor-axis/major-axis)  [radians]
         phi_x: phase for E field in x-direction           [radians]
         E_0: amplitude of field
+        convention: 'default', 'alternate', or None for get_convention()
     Returns:
-        Jones vector with specified characteristics
+        Jones vector with specified characteristics, shape (..., 2) when
+        the arguments are arrays
     """
     ce = np.cos(elliptic_angle)
     se = np.sin(elliptic_angle)
     ca = np.cos(azimuth)
     sa = np.sin(azimuth)
 
-    J = E_0 * np.array([ca*ce-sa*se*1j, sa*ce+ca*se*1j])
+    J = np.stack(np.broadcast_arrays(ca*ce-sa*se*1j, sa*ce+ca*se*1j), axis=-1)
+    J = np.asarray(E_0)[..., None] * J
 
-    J *= np.exp(1j * (phi_x-np.angle(J[0])))
+    J = J * np.exp(1j * (phi_x-np.angle(J[..., 0])))[..., None]
 
-    if alternate_sign_convention:
+    if is_alternate(convention):
         return np.conjugate(J)
     return J
 
@@ -329,16 +554,27 @@ def interpret(J):
     return s
 
 
+def _field_amplitudes(J):
+    """
+    Return the x and y components of a Jones vector or array of them.
+
+    The components are taken from the last axis of J, so arrays of Jones
+    vectors with shape (..., 2) are handled without copying.
+    """
+    J = np.asarray(J)
+    return J[..., 0], J[..., 1]
+
+
 def normalize_vector(J):
     """
     Normalize a vector by dividing each part by common number.
 
-    After normalization the magnitude should be equal to ~1.
+    After normalization the magnitude should be equal to ~1.  Arrays
+    of Jones vectors with shape (..., 2) are normalized individually.
     """
-    norm = np.linalg.norm(J)
-    if norm == 0:
-        return J
-    return J / norm
+    J = np.asarray(J)
+    norm = np.linalg.norm(J, axis=-1, keepdims=True)
+    return J / np.where(norm == 0, 1, norm)
 
 
 def normalize(J):
@@ -351,13 +587,15 @@ def normalize(J):
 
 def intensity(J):
     """Return the intensity."""
-    inten = abs(J[0])**2 + abs(J[1])**2
+    Ex, Ey = _field_amplitudes(J)
+    inten = abs(Ex)**2 + abs(Ey)**2
     return inten
 
 
 def phase(J):
     """Return the phase."""
-    gamma = np.angle(J[1]) - np.angle(J[0])
+    Ex, Ey = _field_amplitudes(J)
+    gamma = np.angle(Ey) - np.angle(Ex)
     return gamma
 
 
@@ -368,7 +606,8 @@ def ellipse_azimuth(J):
     The polarization ellipse is rotated by this angle (called
     the azimuth) relative to the laboratory frame.
     """
-    Ex0, Ey0 = np.abs(J)
+    Ex, Ey = _field_amplitudes(J)
+    Ex0, Ey0 = np.abs(Ex), np.abs(Ey)
     delta = phase(J)
     numer = 2 * Ex0 * Ey0 * np.cos(delta)
     denom = Ex0**2 - Ey0**2
@@ -394,7 +633,8 @@ def ellipse_axes(J):
 
     Twice these values will be the semi-major or semi-minor diameters.
     """
-    Ex0, Ey0 = np.abs(J)
+    Ex, Ey = _field_amplitudes(J)
+    Ex0, Ey0 = np.abs(Ex), np.abs(Ey)
     alpha = ellipse_azimuth(J)
     delta = phase(J)
     C = np.cos(alpha)
@@ -403,9 +643,7 @@ def ellipse_axes(J):
     bsqr = (Ex0 * S)**2 + (Ey0 * C)**2 - 2 * Ex0 * Ey0 * C * S * np.cos(delta)
     a = np.sqrt(abs(asqr))
     b = np.sqrt(abs(bsqr))
-    if a < b:
-        return b, a
-    return a, b
+    return np.maximum(a, b), np.minimum(a, b)
 
 
 def ellipticity(J):
@@ -420,9 +658,8 @@ def ellipticity(J):
     LCP to Linear Polarization to RCP.
     """
     a, b = ellipse_axes(J)
-    if phase(J) < 0:
-        return -b/a
-    return b/a
+    e = b / a
+    return np.where(phase(J) < 0, -e, e)[()]
 
 
 def ellipticity_angle(J):
@@ -435,14 +672,8 @@ def ellipticity_angle(J):
     ellipticity.
     """
     a, b = ellipse_axes(J)
-    if abs(a) >= abs(b):
-        epsilon = np.arctan2(b, a)
-    else:
-        epsilon = np.arctan2(a, b)
-
-    if phase(J) < 0:
-        return -epsilon
-    return epsilon
+    epsilon = np.arctan2(b, a)
+    return np.where(phase(J) < 0, -epsilon, epsilon)[()]
 
 
 def amplitude_ratio(J):
@@ -452,10 +683,11 @@ def amplitude_ratio(J):
     This is the amplitude of the vibrations along x measured
     relative to the amplitude along y.
     """
-    Ex0, Ey0 = np.abs(J)
-    if Ex0 == 0:
-        return np.inf
-    return Ey0/Ex0
+    Ex, Ey = _field_amplitudes(J)
+    Ex0, Ey0 = np.abs(Ex), np.abs(Ey)
+    no_x = Ex0 == 0
+    ratio = Ey0 / np.where(no_x, 1, Ex0)
+    return np.where(no_x, np.inf, ratio)[()]
 
 
 def amplitude_ratio_angle(J):
@@ -465,8 +697,8 @@ def amplitude_ratio_angle(J):
     The tangent of this angle is the ratio of electric fields in
     the y and x directions.
     """
-    Ex0, Ey0 = np.abs(J)
-    psi = np.arctan2(Ey0, Ex0)
+    Ex, Ey = _field_amplitudes(J)
+    psi = np.arctan2(np.abs(Ey), np.abs(Ex))
     return psi
 
 
@@ -478,54 +710,96 @@ def poincare_point(J):
     return latitude, longitude
 
 
-def jones_op_to_mueller_op(JJ):
+EllipseParameters = namedtuple('EllipseParameters',
+                               ['intensity',
+                                'phase',
+                                'azimuth',
+                                'a',
+                                'b',
+                                'ellipticity',
+                                'ellipticity_angle',
+                                'amplitude_ratio_angle',
+                                'latitude',
+                                'longitude'])
+
+
+def ellipse_parameters(J):
+    """
+    Return all the parameters of the polarization ellipse at once.
+
+    This gives the same values as intensity(), phase(), ellipse_azimuth(),
+    ellipse_axes(), ellipticity(), ellipticity_angle(),
+    amplitude_ratio_angle() and poincare_point(), but the amplitudes,
+    phase and azimuth are only calculated once.
+
+    Args:
+        J: Jones vector or array of Jones vectors with shape (..., 2)
+    Returns:
+        EllipseParameters named tuple (latitude and longitude are the
+        point on the Poincaré sphere)
+    """
+    Ex, Ey = _field_amplitudes(J)
+    Ex0, Ey0 = np.abs(Ex), np.abs(Ey)
+    gamma = np.angle(Ey) - np.angle(Ex)
+    XY = 2 * Ex0 * Ey0 * np.cos(gamma)
+    XX = Ex0**2
+    YY = Ey0**2
+    alpha = 0.5 * np.arctan2(XY, XX - YY)
+
+    CC = np.cos(alpha)**2
+    SS = 1 - CC
+    cross = XY * np.cos(alpha) * np.sin(alpha)
+    a = np.sqrt(abs(XX * CC + YY * SS + cross))
+    b = np.sqrt(abs(XX * SS + YY * CC - cross))
+    a, b = np.maximum(a, b), np.minimum(a, b)
+
+    left = gamma < 0
+    e = b / a
+    epsilon = np.arctan2(b, a)
+    return EllipseParameters(intensity=XX + YY,
+                             phase=gamma,
+                             azimuth=alpha,
+                             a=a,
+                             b=b,
+                             ellipticity=np.where(left, -e, e)[()],
+                             ellipticity_angle=np.where(left, -epsilon, epsilon)[()],
+                             amplitude_ratio_angle=np.arctan2(Ey0, Ex0),
+                             latitude=2 * epsilon,
+                             longitude=2 * alpha)
+
+
+def jones_op_to_mueller_op(JJ, out=None, convention=None):
     """
     Convert a complex 2x2 Jones matrix to a real 4x4 Mueller matrix.
 
     Hauge, Muller, and Smith, "Conventions and Formulas for Using the Mueller-
     Stokes Calculus in Ellipsometry," Surface Science, 96, 81-107 (1980)
+
+    The conversion is M = A (J ⊗ J*) A^-1 and is evaluated for every
+    matrix in a stack of Jones matrices at once.
+
     Args:
-        J:      Jones matrix
+        JJ:     Jones matrix or stack of Jones matrices with shape (..., 2, 2)
+        out:    optional real array with shape (..., 4, 4) for the result;
+                a C-contiguous float array is filled directly by the product
+        convention: 'default', 'alternate', or None for get_convention()
     Returns:
-        equivalent 4x4 Mueller matrix
-    """
-    if alternate_sign_convention:
-        J = np.conjugate(JJ)
+        equivalent 4x4 Mueller matrix (or stack of them)
+    """
+    J = np.asarray(JJ)
+    if is_alternate(convention):
+        J = np.conjugate(J)
+    kernels = pypolar.backend.kernels()
+    if kernels is not None:
+        return kernels.jones_op_to_mueller_op(J, out)
+    shape = J.shape[:-2]
+    J = J.astype(complex, copy=False)
+    K = np.einsum('...ij,...kl->...ikjl', J, np.conjugate(J))
+    K = K.reshape(shape + (16,)).view(float)
+    if out is None:
+        out = np.empty(shape + (4, 4))
+    if out.dtype == float and out.flags.c_contiguous:
+        np.matmul(K, _KRON_TO_MUELLER_REAL, out=out.reshape(shape + (16,)))
     else:
-        J = JJ
-    M = np.zeros(shape=[4, 4], dtype=np.complex)
-    C = np.conjugate(J)
-    M[0, 0] = J[0, 0] * C[0, 0] + J[0, 1] * C[0, 1] + \
-        J[1, 0] * C[1, 0] + J[1, 1] * C[1, 1]
-    M[0, 1] = J[0, 0] * C[0, 0] + J[1, 0] * C[1, 0] - \
-        J[0, 1] * C[0, 1] - J[1, 1] * C[1, 1]
-    M[0, 2] = J[0, 1] * C[0, 0] + J[1, 1] * C[1, 0] + \
-        J[0, 0] * C[0, 1] + J[1, 0] * C[1, 1]
-    M[0, 3] = 1j * (J[0, 1] * C[0, 0] + J[1, 1] * C[1, 0] -
-                    J[0, 0] * C[0, 1] - J[1, 0] * C[1, 1])
-    M[1, 0] = J[0, 0] * C[0, 0] + J[0, 1] * C[0, 1] - \
-        J[1, 0] * C[1, 0] - J[1, 1] * C[1, 1]
-    M[1, 1] = J[0, 0] * C[0, 0] - J[1, 0] * C[1, 0] - \
-        J[0, 1] * C[0, 1] + J[1, 1] * C[1, 1]
-    M[1, 2] = J[0, 0] * C[0, 1] + J[0, 1] * C[0, 0] - \
-        J[1, 0] * C[1, 1] - J[1, 1] * C[1, 0]
-    M[1, 3] = 1j * (J[0, 1] * C[0, 0] + J[1, 0] * C[1, 1] -
-                    J[1, 1] * C[1, 0] - J[0, 0] * C[0, 1])
-    M[2, 0] = J[0, 0] * C[1, 0] + J[1, 0] * C[0, 0] + \
-        J[0, 1] * C[1, 1] + J[1, 1] * C[0, 1]
-    M[2, 1] = J[0, 0] * C[1, 0] + J[1, 0] * C[0, 0] - \
-        J[0, 1] * C[1, 1] - J[1, 1] * C[0, 1]
-    M[2, 2] = J[0, 0] * C[1, 1] + J[0, 1] * C[1, 0] + \
-        J[1, 0] * C[0, 1] + J[1, 1] * C[0, 0]
-    M[2, 3] = 1j * (-J[0, 0] * C[1, 1] + J[0, 1] * C[1, 0] -
-                    J[1, 0] * C[0, 1] + J[1, 1] * C[0, 0])
-    M[3, 0] = 1j * (J[0, 0] * C[1, 0] + J[0, 1] * C[1, 1] -
-                    J[1, 0] * C[0, 0] - J[1, 1] * C[0, 1])
-    M[3, 1] = 1j * (J[0, 0] * C[1, 0] - J[0, 1] * C[1, 1] -
-                    J[1, 0] * C[0, 0] + J[1, 1] * C[0, 1])
-    M[3, 2] = 1j * (J[0, 0] * C[1, 1] + J[0, 1] * C[1, 0] -
-                    J[1, 0] * C[0, 1] - J[1, 1] * C[0, 0])
-    M[3, 3] = J[0, 0] * C[1, 1] - J[0, 1] * C[1, 0] - \
-        J[1, 0] * C[0, 1] + J[1, 1] * C[0, 0]
-    MM = M.real / 2
-    return MM
+        np.copyto(out, np.matmul(K, _KRON_TO_MUELLER_REAL).reshape(shape + (4, 4)))
+    return out
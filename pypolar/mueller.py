@@ -13,7 +13,10 @@ Scott Prahl
 May 2018
 """
 
+from collections import namedtuple
+
 import numpy as np
+import pypolar.backend
 import pypolar.jones
 import pypolar.fresnel
 
@@ -37,27 +40,45 @@ __all__ = ('op_linear_polarizer',
            'ellipse_orientation',
            'ellipse_ellipticity',
            'ellipse_axes',
+           'ellipse_parameters',
+           'EllipseParameters',
            'stokes_to_jones',
            'mueller_to_jones',
            'interpret')
 
 
+def _zeros_op(shape):
+    """
+    Allocate a zeroed stack of 4x4 Mueller operators.
+
+    Args:
+        shape: leading (broadcast) dimensions of the stack
+    Returns:
+        array with shape (*shape, 4, 4)
+    """
+    return np.zeros(tuple(shape) + (4, 4))
+
+
 def op_linear_polarizer(theta):
     """
     Mueller matrix operator for a rotated linear polarizer.
 
     The polarizer is rotated around a normal to its surface.
+    An array of angles returns a stack of operators with shape (..., 4, 4).
 
     Args:
         theta: rotation angle measured from the horizontal plane [radians]
     """
     C2 = np.cos(2 * theta)
     S2 = np.sin(2 * theta)
-    lp = np.array([[1, C2, S2, 0],
-                   [C2, C2**2, C2 * S2, 0],
-                   [S2, C2 * S2, S2 * S2, 0],
-                   [0, 0, 0, 0]])
-    return 0.5 * lp
+    lp = _zeros_op(np.shape(C2))
+    lp[..., 0, 0] = 0.5
+    lp[..., 0, 1] = lp[..., 1, 0] = 0.5 * C2
+    lp[..., 0, 2] = lp[..., 2, 0] = 0.5 * S2
+    lp[..., 1, 1] = 0.5 * C2 * C2
+    lp[..., 1, 2] = lp[..., 2, 1] = 0.5 * C2 * S2
+    lp[..., 2, 2] = 0.5 * S2 * S2
+    return lp
 
 
 def op_retarder(theta, delta):
@@ -65,19 +86,28 @@ def op_retarder(theta, delta):
     Mueller matrix operator for an rotated optical retarder.
 
     The retarder is rotated around a normal to its surface.
+    Arrays of angles and retardances are broadcast against each other
+    and return a stack of operators with shape (..., 4, 4).
 
     Args:
         theta: rotation angle between fast-axis and the horizontal plane [radians]
         delta: phase delay introduced between fast and slow-axes         [radians]
     """
+    theta, delta = np.broadcast_arrays(theta, delta)
     C2 = np.cos(2 * theta)
     S2 = np.sin(2 * theta)
     C = np.cos(delta)
     S = np.sin(delta)
-    ret = np.array([[1, 0, 0, 0],
-                    [0, C2**2 + C * S2**2, (1 - C) * S2 * C2, -S * S2],
-                    [0, (1 - C) * C2 * S2, S2**2 + C * C2**2, S * C2],
-                    [0, S * S2, -S * C2, C]])
+    ret = _zeros_op(theta.shape)
+    ret[..., 0, 0] = 1
+    ret[..., 1, 1] = C2 * C2 + C * S2 * S2
+    ret[..., 1, 2] = ret[..., 2, 1] = (1 - C) * S2 * C2
+    ret[..., 1, 3] = -S * S2
+    ret[..., 2, 2] = S2 * S2 + C * C2 * C2
+    ret[..., 2, 3] = S * C2
+    ret[..., 3, 1] = S * S2
+    ret[..., 3, 2] = -S * C2
+    ret[..., 3, 3] = C
     return ret
 
 
@@ -85,13 +115,15 @@ def op_attenuator(t):
     """
     Mueller matrix operator for an optical attenuator.
 
+    An array of transmittances returns a stack of operators
+    with shape (..., 4, 4).
+
     Args:
         t : fraction of light getting through attenuator [---]
     """
-    att = np.array([[t, 0, 0, 0],
-                    [0, t, 0, 0],
-                    [0, 0, t, 0],
-                    [0, 0, 0, t]])
+    att = _zeros_op(np.shape(t))
+    for i in range(4):
+        att[..., i, i] = t
     return att
 
 
@@ -108,15 +140,20 @@ def op_rotation(theta):
     """
     Mueller matrix operator to rotate light around the optical axis.
 
+    An array of angles returns a stack of operators with shape (..., 4, 4).
+
     Args:
         theta: rotation angle  [radians]
     """
     C2 = np.cos(2 * theta)
     S2 = np.sin(2 * theta)
-    rot = np.array([[1, 0, 0, 0],
-                    [0, C2, S2, 0],
-                    [0, -S2, C2, 0],
-                    [0, 0, 0, 1]])
+    rot = _zeros_op(np.shape(C2))
+    rot[..., 0, 0] = 1
+    rot[..., 1, 1] = C2
+    rot[..., 1, 2] = S2
+    rot[..., 2, 1] = -S2
+    rot[..., 2, 2] = C2
+    rot[..., 3, 3] = 1
     return rot
 
 
@@ -124,6 +161,8 @@ def op_quarter_wave_plate(theta):
     """
     Mueller matrix operator for an quarter-wave plate.
 
+    An array of angles returns a stack of operators with shape (..., 4, 4).
+
     Args:
         theta: rotation angle between fast-axis and the horizontal plane [radians]
 
@@ -132,10 +171,15 @@ def op_quarter_wave_plate(theta):
     """
     C2 = np.cos(2 * theta)
     S2 = np.sin(2 * theta)
-    qwp = np.array([[1, 0, 0, 0],
-                    [0, C2**2, C2 * S2, -S2],
-                    [0, C2 * S2, S2 * S2, C2],
-                    [0, S2, -C2, 0]])
+    qwp = _zeros_op(np.shape(C2))
+    qwp[..., 0, 0] = 1
+    qwp[..., 1, 1] = C2 * C2
+    qwp[..., 1, 2] = qwp[..., 2, 1] = C2 * S2
+    qwp[..., 1, 3] = -S2
+    qwp[..., 2, 2] = S2 * S2
+    qwp[..., 2, 3] = C2
+    qwp[..., 3, 1] = S2
+    qwp[..., 3, 2] = -C2
     return qwp
 
 
@@ -143,6 +187,8 @@ def op_half_wave_plate(theta):
     """
     Mueller matrix for a rotated half-wave plate.
 
+    An array of angles returns a stack of operators with shape (..., 4, 4).
+
     Args:
         theta: rotation angle between fast-axis and the horizontal plane [radians]
 
@@ -151,11 +197,13 @@ def op_half_wave_plate(theta):
     """
     C2 = np.cos(2 * theta)
     S2 = np.sin(2 * theta)
-    qwp = np.array([[1, 0, 0, 0],
-                    [0, C2**2 - S2**2, 2 * C2 * S2, 0],
-                    [0, 2 * C2 * S2, S2 * S2 - C2**2, 0],
-                    [0, 0, 0, -1]])
-    return qwp
+    hwp = _zeros_op(np.shape(C2))
+    hwp[..., 0, 0] = 1
+    hwp[..., 1, 1] = C2 * C2 - S2 * S2
+    hwp[..., 1, 2] = hwp[..., 2, 1] = 2 * C2 * S2
+    hwp[..., 2, 2] = S2 * S2 - C2 * C2
+    hwp[..., 3, 3] = -1
+    return hwp
 
 
 def op_fresnel_reflection(m, theta):
@@ -163,7 +211,9 @@ def op_fresnel_reflection(m, theta):
     Mueller matrix operator for Fresnel reflection at angle theta.
 
     Convert from the Jones operator to ensure that phase change are
-    handled properly
+    handled properly.  Arrays of m and theta return a stack of operators
+    with shape (..., 4, 4).
+
     Args:
         m :     complex index of refraction   [-]
         theta : angle from normal to surface  [radians]
@@ -181,6 +231,7 @@ def op_fresnel_transmission(m, theta):
 
     Unclear if phase changes are handled properly.  See Collett, "Mueller-Stokes
     Matrix Formulation of Fresnel's Equations," Am. J. Phys. 39, 517 (1971).
+    Arrays of m and theta return a stack of operators with shape (..., 4, 4).
 
     Args:
         m :     complex index of refraction       [-]
@@ -190,14 +241,14 @@ def op_fresnel_transmission(m, theta):
     """
     tau_p = pypolar.fresnel.T_par(m, theta)
     tau_s = pypolar.fresnel.T_per(m, theta)
-    a = tau_s + tau_p
-    b = tau_s - tau_p
-    c = 2 * np.sqrt(tau_s*tau_p)
-    mat = np.array([[a, b, 0, 0],
-                    [b, a, 0, 0],
-                    [0, 0, c, 0],
-                    [0, 0, 0, c]])
-    return 0.5 * mat
+    a = (tau_s + tau_p) / 2
+    b = (tau_s - tau_p) / 2
+    c = np.sqrt(tau_s*tau_p)
+    mat = _zeros_op(np.shape(a))
+    mat[..., 0, 0] = mat[..., 1, 1] = a
+    mat[..., 0, 1] = mat[..., 1, 0] = b
+    mat[..., 2, 2] = mat[..., 3, 3] = c
+    return mat
 
 
 def stokes_linear(theta):
@@ -230,44 +281,132 @@ def stokes_unpolarized():
     return np.array([1, 0, 0, 0])
 
 
-def intensity(S):
-    """Return the intensity."""
-    return S[0]
+def _stokes_parameters(S, axis):
+    """
+    Return views of the four Stokes parameters stored along an axis.
+
+    No data is copied, so channel-last images (..., 4) can be analyzed
+    in place.
+
+    Args:
+        S:    Stokes vector or array of Stokes vectors
+        axis: axis of S that holds the four Stokes parameters
+    Returns:
+        S0, S1, S2, S3 each with the remaining dimensions of S
+    """
+    return np.moveaxis(np.asarray(S), axis, 0)
+
 
+def intensity(S, axis=-1):
+    """
+    Return the intensity.
 
-def degree_of_polarization(S):
-    """Return the degree of polarization."""
-    return S[0]/np.sqrt(S[1]**2+S[2]**2+S[3]**2)
+    Args:
+        S:    Stokes vector or array of Stokes vectors
+        axis: axis of S that holds the four Stokes parameters
+    """
+    S0, _, _, _ = _stokes_parameters(S, axis)
+    return S0
 
 
-def ellipse_orientation(S):
+def degree_of_polarization(S, axis=-1):
+    """
+    Return the degree of polarization.
+
+    Args:
+        S:    Stokes vector or array of Stokes vectors
+        axis: axis of S that holds the four Stokes parameters
+    """
+    S0, S1, S2, S3 = _stokes_parameters(S, axis)
+    return np.sqrt(S1**2 + S2**2 + S3**2) / S0
+
+
+def ellipse_orientation(S, axis=-1):
     """
     Return the angle between the major semi-axis and the x-axis.
 
     The polarization ellipse is rotated by an angle from the
     laboratory frame.  This is that angle: often represented by psi.
+
+    Args:
+        S:    Stokes vector or array of Stokes vectors
+        axis: axis of S that holds the four Stokes parameters
     """
-    return 1/2 * np.arctan2(S[2], S[1])
+    _, S1, S2, _ = _stokes_parameters(S, axis)
+    return 1/2 * np.arctan2(S2, S1)
 
 
-def ellipse_ellipticity(S):
+def ellipse_ellipticity(S, axis=-1):
     """
     Return the ellipticity of the polarization ellipse.
 
     This parameter is often represented by Chi.
+
+    Args:
+        S:    Stokes vector or array of Stokes vectors
+        axis: axis of S that holds the four Stokes parameters
     """
-    return 1/2 * np.arcsin(S[3]/S[0])
+    S0, _, _, S3 = _stokes_parameters(S, axis)
+    return 1/2 * np.arcsin(S3 / S0)
+
 
+def ellipse_axes(S, axis=-1):
+    """
+    Returns the semi-major and semi-minor axes of the polarization ellipse.
 
-def ellipse_axes(S):
-    """Returns the semi-major and semi-minor axes of the polarization ellipse."""
-    absL = np.sqrt(S[1]**2 + S[2]**2)
-    A = np.sqrt((S[0] + absL)/2)
-    B = np.sqrt((S[0] - absL)/2)
+    Args:
+        S:    Stokes vector or array of Stokes vectors
+        axis: axis of S that holds the four Stokes parameters
+    """
+    S0, S1, S2, _ = _stokes_parameters(S, axis)
+    absL = np.sqrt(S1**2 + S2**2)
+    A = np.sqrt((S0 + absL)/2)
+    B = np.sqrt((S0 - absL)/2)
     return A, B
 
 
-def stokes_to_jones(S):
+EllipseParameters = namedtuple('EllipseParameters',
+                               ['intensity',
+                                'degree_of_polarization',
+                                'orientation',
+                                'ellipticity',
+                                'a',
+                                'b',
+                                'latitude',
+                                'longitude'])
+
+
+def ellipse_parameters(S, axis=-1):
+    """
+    Return all the parameters of the polarization ellipse at once.
+
+    This gives the same values as intensity(), degree_of_polarization(),
+    ellipse_orientation(), ellipse_ellipticity() and ellipse_axes(), but
+    the shared terms are only calculated once.
+
+    Args:
+        S:    Stokes vector or array of Stokes vectors
+        axis: axis of S that holds the four Stokes parameters
+    Returns:
+        EllipseParameters named tuple (latitude and longitude are the
+        point on the Poincaré sphere)
+    """
+    S0, S1, S2, S3 = _stokes_parameters(S, axis)
+    LL = S1**2 + S2**2
+    absL = np.sqrt(LL)
+    psi = 1/2 * np.arctan2(S2, S1)
+    chi = 1/2 * np.arcsin(S3 / S0)
+    return EllipseParameters(intensity=S0,
+                             degree_of_polarization=np.sqrt(LL + S3**2) / S0,
+                             orientation=psi,
+                             ellipticity=chi,
+                             a=np.sqrt((S0 + absL)/2),
+                             b=np.sqrt((S0 - absL)/2),
+                             latitude=2 * chi,
+                             longitude=2 * psi)
+
+
+def stokes_to_jones(S, convention=None):
     """
     Convert a Stokes vector to a Jones vector.
 
@@ -276,68 +415,123 @@ def stokes_to_jones(S):
     with its horizontal component represented as a real number.
 
     The sign convention for the Jones vector can be set by calling
-    `pypolar.jones.use_alternate_convention(True)`.  The default is to assume that
-    the field is represented by exp(j*omega*t-k*z).
+    `pypolar.jones.use_alternate_convention(True)`, within a
+    `pypolar.jones.sign_convention()` block, or with the convention
+    argument.  The default is to assume that the field is represented by
+    exp(j*omega*t-k*z).
+
+    Zero-intensity and unpolarized Stokes vectors map to a zero field and
+    vertically polarized light to a field with no horizontal component.
+    These cases are selected with masks so that arrays of Stokes vectors
+    are converted in one call.
 
     Inputs:
-        S : a Stokes vector
+        S : a Stokes vector or array of them with shape (..., 4)
+        convention: 'default', 'alternate', or None for the current one
 
     Returns:
-         the Jones vector for
+         the Jones vector (or array of them with shape (..., 2))
     """
-    if S[0] == 0:
-        return np.array([0, 0])
+    kernels = pypolar.backend.kernels()
+    if kernels is not None:
+        J = kernels.stokes_to_jones(S)
+        if pypolar.jones.is_alternate(convention):
+            return np.conjugate(J, out=J)
+        return J
+
+    S0, S1, S2, S3 = _stokes_parameters(S, -1)
 
     # Fraction of intensity that is polarized
-    Ip = np.sqrt(S[1]**2 + S[2]**2 + S[3]**2)
+    Ip = np.sqrt(S1**2 + S2**2 + S3**2)
+    dark = (S0 == 0) | (Ip == 0)
+    Ip = np.where(dark, 1, Ip)
 
     # Normalize the remaining Stokes parameters to this fraction
-    Q = S[1] / Ip
-    U = S[2] / Ip
-    V = S[3] / Ip
+    Q = S1 / Ip
+    U = S2 / Ip
+    V = S3 / Ip
 
     # Amplitude of the polarized field
-    E_0 = np.sqrt(Ip)
+    E_0 = np.where(dark, 0, np.sqrt(Ip))
 
     # vertically polarized light has no E_x field
-    if Q == -1:
-        return np.array([0, E_0])
+    A = np.sqrt(np.maximum(1 + Q, 0) / 2)
+    vertical = A == 0
+    A2 = np.where(vertical, 1, 2 * A)
 
     # Assemble the Jones vector
-    A = np.sqrt((1 + Q) / 2)
-    J = E_0 * np.array([A, complex(U, V) / (2 * A)])
+    J = np.empty(np.shape(S0) + (2,), dtype=complex)
+    J[..., 0] = E_0 * A
+    J[..., 1] = np.where(vertical, E_0, E_0 * (U + 1j * V) / A2)
 
-    if pypolar.jones.alternate_sign_convention:
-        return np.conjugate(J)
+    if pypolar.jones.is_alternate(convention):
+        return np.conjugate(J, out=J)
 
     return J
 
 
-def mueller_to_jones(M):
+def _mueller_to_jones(M):
+    """Return the Jones matrices for a stack of Mueller matrices M."""
+    M00, M01, M02, M03 = M[..., 0, 0], M[..., 0, 1], M[..., 0, 2], M[..., 0, 3]
+    M10, M11, M12, M13 = M[..., 1, 0], M[..., 1, 1], M[..., 1, 2], M[..., 1, 3]
+    M20, M21, M22, M23 = M[..., 2, 0], M[..., 2, 1], M[..., 2, 2], M[..., 2, 3]
+    M30, M31, M32, M33 = M[..., 3, 0], M[..., 3, 1], M[..., 3, 2], M[..., 3, 3]
+
+    A = np.empty(M.shape[:-2] + (2, 2))
+    A[..., 0, 0] = (M00 + M01) + (M10 + M11)
+    A[..., 0, 1] = (M00 - M01) + (M10 - M11)
+    A[..., 1, 0] = (M00 + M01) - (M10 + M11)
+    A[..., 1, 1] = (M00 - M01) - (M10 - M11)
+    np.clip(A, 0, None, out=A)
+    np.sqrt(A / 2, out=A)
+
+    theta = np.empty(M.shape[:-2] + (2, 2))
+    theta[..., 0, 0] = 0
+    theta[..., 0, 1] = -np.arctan2(M03 + M13, M02 + M12)
+    theta[..., 1, 0] = np.arctan2(M30 + M31, M20 + M21)
+    theta[..., 1, 1] = np.arctan2(M32 - M23, M22 + M33)
+
+    return A * np.exp(1j * theta)
+
+
+def mueller_to_jones(M, return_residual=False, convention=None):
     """
     Convert a Mueller matrix to a Jones matrix.
 
     Theocaris, Matrix Theory of Photoelasticity, eqns 4.70-4.76, 1979
 
+    Only nondepolarizing Mueller matrices have a Jones equivalent.  The
+    residual is the Frobenius norm of the difference between M and the
+    Mueller matrix of the returned Jones matrix (relative to M[0,0]) and
+    can be used to mask entries where the conversion is invalid.  The
+    phases are referenced to J[0,0], so the residual is also large when
+    J[0,0] vanishes.
+
     Inputs:
-        M : a 4x4 Mueller matrix
+        M : a 4x4 Mueller matrix or stack of them with shape (..., 4, 4)
+        return_residual: also return the residual of the conversion
+        convention: 'default', 'alternate', or None for the current one
 
     Returns:
-         the corresponding 2x2 Jones matrix
+         the corresponding 2x2 Jones matrix (or stack with shape (..., 2, 2))
+         and, when requested, the residual for each matrix
     """
-    A = np.empty((2, 2))
-    A[0, 0] = np.sqrt((M[0, 0]+M[0, 1]+M[1, 0]+M[1, 1])/2)
-    A[0, 1] = np.sqrt((M[0, 0]+M[0, 1]-M[1, 0]-M[1, 1])/2)
-    A[1, 0] = np.sqrt((M[0, 0]-M[0, 1]+M[1, 0]-M[1, 1])/2)
-    A[1, 1] = np.sqrt((M[0, 0]-M[0, 1]-M[1, 0]+M[1, 1])/2)
-
-    theta = np.empty((2, 2))
-    theta[0, 0] = 0
-    theta[0, 1] = -np.arctan2(M[0, 3]+M[1, 3], M[0, 2]+M[1, 2])
-    theta[1, 0] = np.arctan2(M[3, 0]+M[3, 1], M[2, 0]+M[2, 1])
-    theta[1, 1] = np.arctan2(M[3, 2]-M[2, 3], M[2, 2]+M[3, 3])
-
-    return A*np.exp(1j*theta)
+    M = np.asarray(M)
+    kernels = pypolar.backend.kernels()
+    if kernels is not None:
+        J = kernels.mueller_to_jones(M)
+    else:
+        J = _mueller_to_jones(M)
+    if pypolar.jones.is_alternate(convention):
+        J = np.conjugate(J)
+
+    if not return_residual:
+        return J
+
+    diff = M - pypolar.jones.jones_op_to_mueller_op(J, convention=convention)
+    residual = np.sqrt(np.sum(diff**2, axis=(-2, -1)))
+    scale = np.where(M[..., 0, 0] > 0, M[..., 0, 0], 1)
+    return J, residual / scale
 
 
 def interpret(S):
@@ -0,0 +1,239 @@
+# pylint: disable=invalid-name
+# pylint: disable=too-many-instance-attributes
+# pylint: disable=too-many-locals
+"""
+Optical trains assembled from Jones or Mueller operators.
+
+An optical train is an ordered list of elements, each built by one of the
+op_* functions in pypolar.jones or pypolar.mueller.  Light passes through
+the first element first, so the system matrix is
+
+    E[n-1] @ ... @ E[1] @ E[0]
+
+Partial products on both sides of every element are cached.  Changing the
+parameters of one element only rebuilds that element and multiplies it by
+the cached products on either side, so scanning a rotating element in a
+long train costs a constant number of matrix products per step.
+
+Example::
+
+    import numpy as np
+    import pypolar.jones as jones
+    from pypolar.optical_train import OpticalTrain
+
+    train = OpticalTrain()
+    train.append(jones.op_linear_polarizer, theta=0)
+    qwp = train.append(jones.op_quarter_wave_plate, theta=0)
+    train.append(jones.op_linear_polarizer, theta=np.pi/2)
+
+    for angle in np.linspace(0, np.pi, 181):
+        train.set(qwp, theta=angle)
+        J = train.matrix()
+
+Parameters can also be swept jointly without a Python loop.  Each sweep
+adds its own axes to the result, so::
+
+    J = train.sweep((qwp, 'theta', qwp_angles), (2, 'theta', analyzer_angles))
+
+returns a (len(qwp_angles), len(analyzer_angles), 2, 2) tensor computed
+with batched matrix products.
+"""
+
+import numpy as np
+
+__all__ = ('OpticalTrain',)
+
+
+class OpticalTrain():
+    """
+    Ordered collection of polarization elements with a cached system matrix.
+
+    Elements are either op_* constructors together with their keyword
+    parameters, or fixed matrices.  Array-valued parameters produce
+    stacks of matrices and the system matrix is then a stack as well.
+    """
+
+    def __init__(self):
+        """Create an empty optical train."""
+        self._ops = []
+        self._params = []
+        self._matrices = []
+        self._prefix = []
+        self._suffix = []
+        self._prefix_valid = 0
+        self._suffix_valid = 0
+        self._system = None
+        self._last = -1
+
+    def __len__(self):
+        """Return the number of elements in the train."""
+        return len(self._matrices)
+
+    def append(self, op, **params):
+        """
+        Add an element to the end of the train.
+
+        Args:
+            op:     op_* function (called as op(**params)) or a fixed matrix
+            params: keyword parameters passed to op
+        Returns:
+            index of the new element
+        """
+        if callable(op):
+            matrix = op(**params)
+        else:
+            if params:
+                raise ValueError("parameters can only be given with an op_* function")
+            matrix = np.asarray(op)
+            op = None
+        self._ops.append(op)
+        self._params.append(dict(params))
+        self._matrices.append(matrix)
+        self._prefix.append(None)
+        self._suffix.append(None)
+
+        # every suffix product now lacks the new last element
+        n = len(self._matrices)
+        self._suffix_valid = n
+        self._system = None
+        self._last = n - 1
+        return n - 1
+
+    def set(self, index, **params):
+        """
+        Change the parameters of one element.
+
+        Only this element is rebuilt; the cached products on either side
+        of it remain valid.
+
+        Args:
+            index:  position of the element in the train
+            params: keyword parameters to update
+        """
+        index = range(len(self._matrices))[index]
+        op = self._ops[index]
+        if op is None:
+            raise ValueError("element %d is a fixed matrix" % index)
+        self._params[index].update(params)
+        self._matrices[index] = op(**self._params[index])
+
+        self._prefix_valid = min(self._prefix_valid, index)
+        self._suffix_valid = max(self._suffix_valid, index + 1)
+        self._system = None
+        self._last = index
+
+    def parameters(self, index):
+        """Return a copy of the keyword parameters of one element."""
+        return dict(self._params[index])
+
+    def element(self, index):
+        """Return the matrix of one element."""
+        return self._matrices[index]
+
+    def _prefix_product(self, i):
+        """Return E[i] @ ... @ E[0] or None when i < 0."""
+        if i < 0:
+            return None
+        for j in range(self._prefix_valid, i + 1):
+            if j == 0:
+                self._prefix[j] = self._matrices[j]
+            else:
+                self._prefix[j] = self._matrices[j] @ self._prefix[j - 1]
+        self._prefix_valid = max(self._prefix_valid, i + 1)
+        return self._prefix[i]
+
+    def _suffix_product(self, i):
+        """Return E[n-1] @ ... @ E[i] or None when i >= n."""
+        n = len(self._matrices)
+        if i >= n:
+            return None
+        for j in range(self._suffix_valid - 1, i - 1, -1):
+            if j == n - 1:
+                self._suffix[j] = self._matrices[j]
+            else:
+                self._suffix[j] = self._suffix[j + 1] @ self._matrices[j]
+        self._suffix_valid = min(self._suffix_valid, i)
+        return self._suffix[i]
+
+    def matrix(self):
+        """
+        Return the system matrix of the whole train.
+
+        Returns:
+            Jones or Mueller matrix (or stack of them) for the train
+        """
+        if not self._matrices:
+            raise ValueError("the optical train has no elements")
+
+        if self._system is None:
+            k = self._last
+            right = self._prefix_product(k - 1)
+            left = self._suffix_product(k + 1)
+            system = self._matrices[k]
+            if right is not None:
+                system = system @ right
+            if left is not None:
+                system = left @ system
+            self._system = system
+        return self._system
+
+    def sweep(self, *sweeps):
+        """
+        Return the system matrix with element parameters swept over arrays.
+
+        Each sweep is a tuple (index, name, values) and contributes the
+        dimensions of values, in order, to the leading dimensions of the
+        result.  The train itself is not changed.  Products of elements
+        before the first and after the last swept element come from the
+        cache.
+
+        Args:
+            sweeps: (index, name, values) tuples
+        Returns:
+            stack of system matrices with shape (*v1.shape, *v2.shape, ..., n, n)
+        """
+        if not self._matrices:
+            raise ValueError("the optical train has no elements")
+        n = len(self._matrices)
+
+        shapes = [np.shape(values) for _, _, values in sweeps]
+        ndim = sum(len(shape) for shape in shapes)
+        swept = {}
+        offset = 0
+        for (index, name, values), shape in zip(sweeps, shapes):
+            index = range(n)[index]
+            if self._ops[index] is None:
+                raise ValueError("element %d is a fixed matrix" % index)
+            grid = (1,) * offset + shape + (1,) * (ndim - offset - len(shape))
+            swept.setdefault(index, {})[name] = np.reshape(values, grid)
+            offset += len(shape)
+
+        if not swept:
+            return self.matrix()
+
+        first = min(swept)
+        last = max(swept)
+        system = self._prefix_product(first - 1)
+        for i in range(first, last + 1):
+            if i in swept:
+                params = dict(self._params[i], **swept[i])
+                E = self._ops[i](**params)
+            else:
+                E = self._matrices[i]
+            system = E if system is None else E @ system
+        left = self._suffix_product(last + 1)
+        if left is not None:
+            system = left @ system
+        return system
+
+    def propagate(self, field):
+        """
+        Return the field after passing through the train.
+
+        Args:
+            field: Jones or Stokes vector (or array of them)
+        Returns:
+            the transformed Jones or Stokes vector(s)
+        """
+        field = np.asarray(field)
+        return (self.matrix() @ field[..., None])[..., 0]
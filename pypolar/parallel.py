@@ -0,0 +1,251 @@
+# pylint: disable=invalid-name
+# pylint: disable=too-many-arguments
+# pylint: disable=too-many-locals
+"""
+Parallel evaluation of vectorized routines over large batches.
+
+The Jones and Mueller routines accept stacks of operators (..., 2, 2) or
+(..., 4, 4) and of vectors (..., 2) or (..., 4).  apply() splits such a
+stack along its leading axes into chunks and evaluates them in a pool of
+workers:
+
+* backend='thread' uses a thread pool.  NumPy releases the GIL inside its
+  kernels, so threads scale well for large chunks and need no copies.
+* backend='process' uses a process pool.  The input and output arrays are
+  placed in shared memory so that only their names are sent to the
+  workers.  The function must be importable (defined at module level).
+  This backend needs Python 3.8 or later.
+
+An existing concurrent.futures executor may be passed as backend to avoid
+starting a new pool on every call.  The sign convention of the caller
+(see pypolar.jones.sign_convention) is used by every worker.
+
+Example::
+
+    import pypolar.parallel as parallel
+
+    # J has shape (frames, rows, cols, 2, 2)
+    M = parallel.jones_op_to_mueller_op(J, workers=32)
+"""
+
+import concurrent.futures
+import contextvars
+import os
+
+import numpy as np
+import pypolar.jones
+import pypolar.mueller
+
+__all__ = ('apply',
+           'jones_op_to_mueller_op',
+           'mueller_to_jones',
+           'stokes_to_jones',
+           'ellipse_parameters')
+
+
+def _as_tuple(result):
+    """Return the outputs of a function as a tuple of arrays."""
+    if isinstance(result, tuple):
+        return tuple(np.asarray(r) for r in result)
+    return (np.asarray(result),)
+
+
+def _from_tuple(first, outputs):
+    """Return outputs packed the same way as the result first."""
+    if not isinstance(first, tuple):
+        return outputs[0]
+    if hasattr(first, '_fields'):
+        return type(first)(*outputs)
+    return tuple(outputs)
+
+
+def _thread_chunk(func, flat, outputs, start, stop, kwargs):
+    """Evaluate one chunk and store the results in outputs."""
+    for out, result in zip(outputs, _as_tuple(func(flat[start:stop], **kwargs))):
+        out[start:stop] = result
+
+
+def _attach(spec):
+    """Return (shared memory, array) for a (name, shape, dtype) spec."""
+    from multiprocessing import shared_memory  # pylint: disable=import-outside-toplevel
+    name, shape, dtype = spec
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+def _process_chunk(func, in_spec, out_specs, start, stop, convention, kwargs):
+    """Evaluate one chunk in a worker process using shared memory."""
+    shm_in, flat = _attach(in_spec)
+    attached = [_attach(spec) for spec in out_specs]
+    try:
+        with pypolar.jones.sign_convention(convention):
+            results = _as_tuple(func(flat[start:stop], **kwargs))
+        for (_, out), result in zip(attached, results):
+            out[start:stop] = result
+    finally:
+        del flat
+        shm_in.close()
+        for shm, out in attached:
+            del out
+            shm.close()
+
+
+def _shared_copy(array, shms):
+    """Copy array into new shared memory and return its spec."""
+    from multiprocessing import shared_memory  # pylint: disable=import-outside-toplevel
+    shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    shms.append(shm)
+    np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[...] = array
+    return shm.name, array.shape, array.dtype.str
+
+
+def _run_processes(executor, func, flat, outputs, bounds, kwargs):
+    """Evaluate all chunks in worker processes and fill outputs."""
+    shms = []
+    try:
+        in_spec = _shared_copy(flat, shms)
+        out_specs = [_shared_copy(out, shms) for out in outputs]
+        convention = pypolar.jones.get_convention()
+        futures = [executor.submit(_process_chunk, func, in_spec, out_specs,
+                                   start, stop, convention, kwargs)
+                   for start, stop in bounds]
+        for future in futures:
+            future.result()
+        for shm, out in zip(shms[1:], outputs):
+            out[...] = np.ndarray(out.shape, dtype=out.dtype, buffer=shm.buf)
+    finally:
+        for shm in shms:
+            shm.close()
+            shm.unlink()
+
+
+def _run_threads(executor, func, flat, outputs, bounds, kwargs):
+    """Evaluate all chunks in worker threads and fill outputs."""
+    futures = [executor.submit(contextvars.copy_context().run, _thread_chunk,
+                               func, flat, outputs, start, stop, kwargs)
+               for start, stop in bounds]
+    for future in futures:
+        future.result()
+
+
+def apply(func, array, core_ndim, workers=None, chunk_size=None, backend='thread',
+          **kwargs):
+    """
+    Evaluate func over a large stack in parallel.
+
+    func must accept a stack with a single leading axis and return one
+    array (or a tuple or named tuple of arrays) with the same leading
+    axis, as all the vectorized Jones and Mueller routines do.
+
+    Args:
+        func:       vectorized function, called as func(chunk, **kwargs)
+        array:      input stack with shape (..., *core)
+        core_ndim:  number of trailing core axes (2 for matrices, 1 for vectors)
+        workers:    number of workers, os.cpu_count() by default
+        chunk_size: number of stack entries per task, by default the
+                    stack is split into four tasks per worker
+        backend:    'thread', 'process', or a concurrent.futures executor
+        kwargs:     keyword arguments passed on to func
+    Returns:
+        result of func with the leading axes of array restored
+    """
+    array = np.asarray(array)
+    lead = array.shape[:array.ndim - core_ndim]
+    n = int(np.prod(lead))
+    flat = array.reshape((n,) + array.shape[array.ndim - core_ndim:])
+
+    workers = workers or os.cpu_count() or 1
+    if chunk_size is None:
+        chunk_size = -(-n // (4 * workers))
+    chunk_size = max(int(chunk_size), 1)
+    bounds = [(start, min(start + chunk_size, n)) for start in range(0, n, chunk_size)]
+    if len(bounds) <= 1:
+        return func(array, **kwargs)
+
+    # the first chunk fixes the shapes and types of the outputs
+    first = func(flat[:bounds[0][1]], **kwargs)
+    outputs = []
+    for result in _as_tuple(first):
+        out = np.empty((n,) + result.shape[1:], dtype=result.dtype)
+        out[:bounds[0][1]] = result
+        outputs.append(out)
+
+    if isinstance(backend, concurrent.futures.Executor):
+        executor, owned = backend, False
+    elif backend == 'thread':
+        executor, owned = concurrent.futures.ThreadPoolExecutor(workers), True
+    elif backend == 'process':
+        executor, owned = concurrent.futures.ProcessPoolExecutor(workers), True
+    else:
+        raise ValueError("backend must be 'thread', 'process', or an executor")
+
+    try:
+        if isinstance(executor, concurrent.futures.ProcessPoolExecutor):
+            _run_processes(executor, func, flat, outputs, bounds[1:], kwargs)
+        else:
+            _run_threads(executor, func, flat, outputs, bounds[1:], kwargs)
+    finally:
+        if owned:
+            executor.shutdown()
+
+    outputs = [out.reshape(lead + out.shape[1:]) for out in outputs]
+    return _from_tuple(first, outputs)
+
+
+def jones_op_to_mueller_op(J, workers=None, chunk_size=None, backend='thread'):
+    """
+    Convert a large stack of Jones matrices to Mueller matrices in parallel.
+
+    Args:
+        J:          Jones matrices with shape (..., 2, 2)
+        workers, chunk_size, backend: see apply()
+    Returns:
+        Mueller matrices with shape (..., 4, 4)
+    """
+    return apply(pypolar.jones.jones_op_to_mueller_op, J, 2,
+                 workers=workers, chunk_size=chunk_size, backend=backend)
+
+
+def mueller_to_jones(M, return_residual=False, workers=None, chunk_size=None,
+                     backend='thread'):
+    """
+    Convert a large stack of Mueller matrices to Jones matrices in parallel.
+
+    Args:
+        M:               Mueller matrices with shape (..., 4, 4)
+        return_residual: also return the residual of each conversion
+        workers, chunk_size, backend: see apply()
+    Returns:
+        Jones matrices with shape (..., 2, 2) and optionally the residuals
+    """
+    return apply(pypolar.mueller.mueller_to_jones, M, 2,
+                 workers=workers, chunk_size=chunk_size, backend=backend,
+                 return_residual=return_residual)
+
+
+def stokes_to_jones(S, workers=None, chunk_size=None, backend='thread'):
+    """
+    Convert a large stack of Stokes vectors to Jones vectors in parallel.
+
+    Args:
+        S:          Stokes vectors with shape (..., 4)
+        workers, chunk_size, backend: see apply()
+    Returns:
+        Jones vectors with shape (..., 2)
+    """
+    return apply(pypolar.mueller.stokes_to_jones, S, 1,
+                 workers=workers, chunk_size=chunk_size, backend=backend)
+
+
+def ellipse_parameters(S, workers=None, chunk_size=None, backend='thread'):
+    """
+    Compute the polarization ellipse of a large stack of Stokes vectors.
+
+    Args:
+        S:          Stokes vectors with shape (..., 4)
+        workers, chunk_size, backend: see apply()
+    Returns:
+        pypolar.mueller.EllipseParameters with arrays of shape (...)
+    """
+    return apply(pypolar.mueller.ellipse_parameters, S, 1,
+                 workers=workers, chunk_size=chunk_size, backend=backend)
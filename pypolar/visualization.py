@@ -3,10 +3,15 @@
 # pylint: disable=too-many-locals
 # pylint: disable=too-many-statements
 # pylint: disable=unused-import
+# pylint: disable=global-statement
+# pylint: disable=import-outside-toplevel
 
 """
 Useful basic routines for visualizing polarization.
 
+matplotlib is imported when the first figure is drawn, so importing this
+module does not load matplotlib or change its settings.
+
 To Do
     * re-orient so xyz match xyz
     *
@@ -16,16 +21,12 @@ Mar 2019
 """
 
 import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib.gridspec as gridspec
-import matplotlib.animation as animation
-from mpl_toolkits.mplot3d import Axes3D
 
 import pypolar.fresnel
 import pypolar.mueller
 import pypolar.jones
 
-plt.rcParams["animation.html"] = "jshtml"
+_plt = None
 
 __all__ = ('draw_jones_field',
            'draw_jones_animated',
@@ -34,6 +35,17 @@ __all__ = ('draw_jones_field',
            'draw_stokes_field',
            'draw_stokes_animated')
 
+def _pyplot():
+    """Import and configure matplotlib on first use and return pyplot."""
+    global _plt
+    if _plt is None:
+        import matplotlib.pyplot as plt
+        from mpl_toolkits.mplot3d import Axes3D
+        plt.rcParams["animation.html"] = "jshtml"
+        _plt = plt
+    return _plt
+
+
 def _draw_optical_axis_3d(J, ax, last=4 * np.pi):
     """
     Draw the optical axis in a 3D plot.
@@ -208,15 +220,16 @@ def _animation_update(offset, J, ax1, ax2):
     return ax1, ax2
 
 
-def draw_jones_ellipse(J):
+def draw_jones_ellipse(J, convention=None):
     """
     Draw a 2D sectional pattern for a Jones vector.
 
     Args:
         J:      Jones vector
+        convention: 'default', 'alternate', or None for the current one
     """
     JJ = J
-    if pypolar.jones.alternate_sign_convention:
+    if pypolar.jones.is_alternate(convention):
         JJ = np.conjugate(J)
     Ex0, Ey0 = np.abs(JJ)
     phix, phiy = np.angle(JJ)
@@ -231,8 +244,9 @@ def draw_jones_ellipse(J):
 
     the_max = max(Ex0, Ey0) * 1.2
 
+    plt = _pyplot()
     plt.figure(figsize=(8, 4))
-    gs = gridspec.GridSpec(1, 2, width_ratios=[1, 1])
+    gs = plt.GridSpec(1, 2, width_ratios=[1, 1])
     ax1 = plt.subplot(gs[0])
     ax1.set_aspect('equal')
     ax1.plot(xx, yy, 'b')
@@ -308,8 +322,9 @@ def draw_jones_field(J, offset=0):
         J:      Jones vector
         offset: starting point
     """
+    plt = _pyplot()
     plt.figure(figsize=(8, 4))
-    gs = gridspec.GridSpec(1, 2, width_ratios=[3, 1])
+    gs = plt.GridSpec(1, 2, width_ratios=[3, 1])
 
     ax1 = plt.subplot(gs[0], projection='3d')
     _draw_3D_field(J, ax1, offset)
@@ -330,19 +345,23 @@ def draw_stokes_field(S, offset=0):
     draw_jones_field(J, offset)
 
 
-def draw_jones_animated(J, nframes=64):
+def draw_jones_animated(J, nframes=64, convention=None):
     """
     Animate 3D and 2D representations of the polarization field.
 
     Args:
         J:      Jones vector
+        nframes: number of frames in the animation
+        convention: 'default', 'alternate', or None for the current one
     """
     JJ = J
-    if pypolar.jones.alternate_sign_convention:
+    if pypolar.jones.is_alternate(convention):
         JJ = np.conjugate(J)
 
+    plt = _pyplot()
+    import matplotlib.animation as animation
     fig = plt.figure(figsize=(8, 4))
-    gs = gridspec.GridSpec(1, 2, width_ratios=[3, 1])
+    gs = plt.GridSpec(1, 2, width_ratios=[3, 1])
     ax1 = plt.subplot(gs[0], projection='3d')
     ax2 = plt.subplot(gs[1])
 
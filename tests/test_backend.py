@@ -0,0 +1,143 @@
+# pylint: disable=invalid-name
+"""Check that the NumPy and numba backends give the same results."""
+
+import numpy as np
+import pytest
+
+import pypolar
+import pypolar.fresnel as fresnel
+import pypolar.jones as jones
+import pypolar.mueller as mueller
+
+pytest.importorskip("numba")
+
+CONVENTIONS = ['default', 'alternate']
+
+FRESNEL_FUNCTIONS = [fresnel.r_par,
+                     fresnel.r_per,
+                     fresnel.t_par,
+                     fresnel.t_per,
+                     fresnel.R_par,
+                     fresnel.R_per,
+                     fresnel.T_par,
+                     fresnel.T_per,
+                     fresnel.R_unpolarized,
+                     fresnel.T_unpolarized,
+                     fresnel.ellipsometry_rho]
+
+
+@pytest.fixture(autouse=True)
+def restore_backend():
+    """Return to the NumPy backend after each test."""
+    yield
+    pypolar.set_backend('numpy')
+
+
+def both_backends(func, *args, **kwargs):
+    """Return func(*args, **kwargs) evaluated with each backend."""
+    pypolar.set_backend('numpy')
+    expected = func(*args, **kwargs)
+    pypolar.set_backend('numba')
+    actual = func(*args, **kwargs)
+    return expected, actual
+
+
+def assert_same(expected, actual):
+    """Check that two results (arrays or tuples of arrays) agree."""
+    if isinstance(expected, tuple):
+        assert isinstance(actual, tuple)
+        assert len(expected) == len(actual)
+        for e, a in zip(expected, actual):
+            assert_same(e, a)
+        return
+    expected = np.asarray(expected)
+    actual = np.asarray(actual)
+    assert expected.shape == actual.shape
+    np.testing.assert_allclose(actual, expected, rtol=1e-12, atol=1e-12)
+
+
+def random_jones(shape, rng):
+    """Return random complex Jones matrices with the given stack shape."""
+    size = shape + (2, 2)
+    return rng.normal(size=size) + 1j * rng.normal(size=size)
+
+
+def random_stokes(shape, rng):
+    """Return random partially polarized Stokes vectors."""
+    S = rng.normal(size=shape + (4,))
+    S[..., 0] = np.linalg.norm(S[..., 1:], axis=-1) * rng.uniform(1, 2, size=shape)
+    return S
+
+
+def fresnel_grid(rng):
+    """Return a (index, angle) grid with absorbing and dielectric indices."""
+    n = rng.uniform(1.2, 4, 6)
+    k = rng.uniform(0, 2, 6)
+    k[:3] = 0
+    m = (n - 1j * k)[:, None]
+    theta_i = np.linspace(0, np.radians(89), 7)[None, :]
+    return m, theta_i
+
+
+@pytest.mark.parametrize('convention', CONVENTIONS)
+@pytest.mark.parametrize('shape', [(), (50,), (4, 5)])
+def test_jones_op_to_mueller_op(convention, shape):
+    rng = np.random.default_rng(1)
+    J = random_jones(shape, rng)
+    with jones.sign_convention(convention):
+        assert_same(*both_backends(jones.jones_op_to_mueller_op, J))
+
+
+@pytest.mark.parametrize('convention', CONVENTIONS)
+@pytest.mark.parametrize('shape', [(), (50,), (4, 5)])
+def test_mueller_to_jones(convention, shape):
+    rng = np.random.default_rng(2)
+    M = jones.jones_op_to_mueller_op(random_jones(shape, rng))
+    with jones.sign_convention(convention):
+        assert_same(*both_backends(mueller.mueller_to_jones, M))
+        assert_same(*both_backends(mueller.mueller_to_jones, M, return_residual=True))
+
+
+@pytest.mark.parametrize('convention', CONVENTIONS)
+@pytest.mark.parametrize('shape', [(), (50,), (4, 5)])
+def test_stokes_to_jones(convention, shape):
+    rng = np.random.default_rng(3)
+    S = random_stokes(shape, rng)
+    with jones.sign_convention(convention):
+        assert_same(*both_backends(mueller.stokes_to_jones, S))
+
+
+@pytest.mark.parametrize('convention', CONVENTIONS)
+def test_stokes_to_jones_special_cases(convention):
+    S = np.array([[0, 0, 0, 0],
+                  [1, 0, 0, 0],
+                  [1, 1, 0, 0],
+                  [1, -1, 0, 0],
+                  [1, 0, 0, 1],
+                  [1, 0, 0, -1]], dtype=float)
+    with jones.sign_convention(convention):
+        assert_same(*both_backends(mueller.stokes_to_jones, S))
+
+
+@pytest.mark.parametrize('func', FRESNEL_FUNCTIONS, ids=lambda f: f.__name__)
+@pytest.mark.parametrize('m', [1.5, 3.9 - 0.02j])
+def test_fresnel_scalar(func, m):
+    expected, actual = both_backends(func, m, np.radians(60))
+    assert np.ndim(actual) == 0
+    assert_same(expected, actual)
+
+
+@pytest.mark.parametrize('func', FRESNEL_FUNCTIONS, ids=lambda f: f.__name__)
+def test_fresnel_grid(func):
+    m, theta_i = fresnel_grid(np.random.default_rng(4))
+    assert_same(*both_backends(func, m, theta_i))
+
+
+@pytest.mark.parametrize('m', [1.5, 3.9 - 0.02j])
+def test_coefficients_scalar(m):
+    assert_same(*both_backends(fresnel.coefficients, m, np.radians(60)))
+
+
+def test_coefficients_grid():
+    m, theta_i = fresnel_grid(np.random.default_rng(5))
+    assert_same(*both_backends(fresnel.coefficients, m, theta_i))
@@ -0,0 +1,55 @@
+# pylint: disable=invalid-name
+"""Tests for the OperatorCache."""
+
+import numpy as np
+
+import pypolar.jones as jones
+from pypolar.cache import OperatorCache
+
+
+def test_repeated_call_is_a_hit():
+    cache = OperatorCache()
+    first = cache(jones.op_retarder, 0.3, 0.5)
+    second = cache(jones.op_retarder, 0.3, 0.5)
+    assert second is first
+    assert cache.info().hits == 1
+    np.testing.assert_allclose(first, jones.op_retarder(0.3, 0.5))
+
+
+def test_integers_and_floats_do_not_collide():
+    cache = OperatorCache()
+    cache(jones.op_retarder, 1e-9, 0.5)
+    R = cache(jones.op_retarder, 1, 0.5)
+    assert cache.info().hits == 0
+    np.testing.assert_allclose(R, jones.op_retarder(1, 0.5), atol=1e-12)
+
+    cache(jones.op_linear_polarizer, 0.5)
+    P = cache(jones.op_linear_polarizer, 500000000)
+    assert cache.info().hits == 0
+    np.testing.assert_allclose(P, jones.op_linear_polarizer(500000000), atol=1e-6)
+
+
+def test_integer_and_equal_float_share_an_entry():
+    cache = OperatorCache()
+    cache(jones.op_retarder, 1, 0.5)
+    cache(jones.op_retarder, 1.0, 0.5)
+    assert cache.info().hits == 1
+
+
+def test_array_parameters_are_not_cached():
+    cache = OperatorCache()
+    theta = np.linspace(0, 1, 3)
+    R = cache(jones.op_linear_polarizer, theta)
+    assert R.shape == (3, 2, 2)
+    assert cache.info().currsize == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = OperatorCache(maxsize=2)
+    cache(jones.op_linear_polarizer, 0.1)
+    cache(jones.op_linear_polarizer, 0.2)
+    cache(jones.op_linear_polarizer, 0.1)
+    cache(jones.op_linear_polarizer, 0.3)
+    assert cache.info().currsize == 2
+    cache(jones.op_linear_polarizer, 0.1)
+    assert cache.info().hits == 2